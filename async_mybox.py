@@ -0,0 +1,368 @@
+import os
+import json
+import asyncio
+import contextlib
+from typing import Literal, Tuple
+from urllib import parse
+
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from mybox import mybox_api
+
+
+'''
+asyncio version of mybox module.
+
+AsyncMybox shares the API functions of mybox (mybox_api class),
+but every API function is coroutine and returns AsyncResponse.
+AsyncResponse is already read, so you can use .json(), .content, .status_code without await
+
+Hundreds of requests can be in flight in a single thread.
+
+--- usage ---
+async def main():
+    async with AsyncMybox() as mb:
+        lists = await asyncio.gather(*[mb.get_list(key) for key in keys])
+        print(lists[0].json())
+
+asyncio.run(main())
+
+Bulk transfer functions (download_tree, upload_tree, upload_large ...)
+are only in mybox class. Use mybox for them.
+
+aiohttp package is needed (pip install aiohttp)
+'''
+
+
+def _encode_params(data) -> str:
+    # same encoding with requests package
+    # list values are repeated and None values are dropped
+    pairs = []
+    for k, v in data.items():
+        vs = v if isinstance(v, (list, tuple)) else [v]
+        for i in vs:
+            if i is not None:
+                pairs.append((k, i))
+    return parse.urlencode(pairs)
+
+
+class AsyncResponse:
+
+    def __init__(self, response, content: bytes):
+        self._response = response
+        self.status_code = response.status
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self._response.get_encoding(), errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        self._response.raise_for_status()
+
+
+class AsyncTransport:
+
+    def __init__(self, pool_size: int = 100, keep_alive: bool = True, timeout=5000):
+        # pool_size: max number of connections in flight
+        # keep_alive: if False connection is closed after every request
+        # timeout: default total timeout. (connect, read) tuple is also possible
+        self._pool_size = pool_size
+        self._keep_alive = keep_alive
+        self._timeout = timeout
+        self._session = None
+        self._stats = {}
+        self._limits = {}
+
+    def _client_timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            return aiohttp.ClientTimeout(connect=timeout[0], sock_read=timeout[1])
+        return aiohttp.ClientTimeout(total=timeout)
+
+    def _count(self, host, field):
+        stat = self._stats.setdefault(host, {'requests': 0, 'connections': 0, 'reused': 0})
+        stat[field] += 1
+
+    def _trace_config(self):
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.host = params.url.raw_authority
+            self._count(ctx.host, 'requests')
+
+        async def on_connection_create_end(session, ctx, params):
+            self._count(ctx.host, 'connections')
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self._count(ctx.host, 'reused')
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace
+
+    def session(self):
+        # aiohttp session should be created in running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._pool_size, force_close=not self._keep_alive)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=self._client_timeout(self._timeout),
+                                                  trace_configs=[self._trace_config()])
+        return self._session
+
+    def _convert_args(self, kargs):
+        # convert requests style arguments to aiohttp arguments
+        kargs.pop('stream', None)
+        if 'timeout' in kargs:
+            kargs['timeout'] = self._client_timeout(kargs['timeout'])
+
+        headers = dict(kargs.pop('headers', None) or {})
+        data = kargs.pop('data', None)
+        files = kargs.pop('files', None)
+
+        if files is not None:
+            form = aiohttp.FormData()
+            for k, v in (data or {}).items():
+                form.add_field(k, str(v))
+            for k, v in files.items():
+                form.add_field(k, v, filename=k)
+            headers.pop('content-type', None)
+            data = form
+        elif isinstance(data, dict):
+            data = _encode_params(data)
+
+        if data is not None:
+            kargs['data'] = data
+        kargs['headers'] = headers
+        return kargs
+
+    def set_host_limit(self, host: str, limit: int):
+        # max number of concurrent requests to the host. same with Transport.set_host_limit
+        self._limits[host] = asyncio.Semaphore(limit)
+
+    def _slot(self, url: str):
+        # semaphore of the host, or nothing if the host is not limited
+        return self._limits.get(parse.urlsplit(url).netloc) or contextlib.nullcontext()
+
+    async def request(self, method: str, url: str, **kargs) -> AsyncResponse:
+        async with self._slot(url):
+            async with self.session().request(method, url, **self._convert_args(kargs)) as r:
+                return AsyncResponse(r, await r.read())
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, url: str, **kargs):
+        # async context manager of aiohttp response. body is not read
+        # slot of the host is kept until the context exits
+        async with self._slot(url):
+            async with self.session().request(method, url, **self._convert_args(kargs)) as r:
+                yield r
+
+    def stats(self) -> dict:
+        # connection reuse statistics per host. same format with Transport.stats
+        return {host: dict(stat) for host, stat in self._stats.items()}
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncMybox(mybox_api):
+
+    def __init__(self, save_path: str = os.path.curdir, pool_size: int = 100, keep_alive: bool = True, timeout=5000):
+        if aiohttp is None:
+            raise ImportError("AsyncMybox needs aiohttp package. (pip install aiohttp)")
+
+        super().__init__(save_path=save_path)
+        self._transport = AsyncTransport(pool_size=pool_size, keep_alive=keep_alive, timeout=timeout)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    # mybox_api.get and mybox_api.post return this coroutine,
+    # so every API function which just returns the response works as it is
+    async def request(self, method: str, url: str, **kargs) -> AsyncResponse:
+        kargs.setdefault('cookies', self.cookies)
+        kargs.setdefault('headers', self.headers)
+        return await self._transport.request(method, url, **kargs)
+
+    def stream(self, method: str, url: str, **kargs):
+        kargs.setdefault('cookies', self.cookies)
+        kargs.setdefault('headers', self.headers)
+        return self._transport.stream(method, url, **kargs)
+
+    async def close(self):
+        await self._transport.close()
+
+    ####################################################################################################
+    # API functions which use the response inside of function
+
+    async def _save(self, url: str, savePath: str) -> int:
+        ret = 0
+        async with self.stream('GET', url) as r:
+            r.raise_for_status()
+            with open(savePath, 'wb') as f:
+                async for chunk in r.content.iter_chunked(8192):
+                    ret += f.write(chunk)
+        return ret
+
+    async def _save_thumb(self, url: str, fileName: str, resourceNo: str) -> int:
+        savePath = os.path.join(self._save_path, '.thumbnails/')
+        if os.path.isdir(savePath) == False:
+            os.makedirs(savePath, exist_ok=True)
+
+        savePath += fileName + '_' + resourceNo + '.jpg'
+
+        self._logger.debug("Save thumb at: {}".format(savePath))
+        ret = await self._save(url, savePath)
+        if ret == 0:
+            os.remove(savePath)
+        return ret
+
+    async def mkdir(self, parentKey: str = 'root', dir_name: str = ''):
+        query = {'resourceKey':           parentKey,
+                 'resourceName':          '새 폴더' if dir_name == '' else dir_name}
+
+        self._logger.info("mkdir: {}".format(query['resourceName']))
+
+        ret = await self.post('https://files.mybox.naver.com/file/mkdir.api?{}'.format(parse.urlencode(query)))
+
+        # Code 1008 means
+        #{'code': 1008, 'message': 'Duplicated Folder Exist'
+        if ret.json()['code'] == 1008:
+            self._logger.info("Directory {} is already exists".format(query['resourceName']))
+        return ret
+
+    async def get_thumb(self, fileName: str, resourceNo: str):
+        url = 'https://thumb1.photo.mybox.naver.com/' + resourceNo + '?type=m740_390_2'
+        return await self._save_thumb(url, fileName, resourceNo)
+
+    async def get_thumb2(self, fileName: str, resourceKey: str, resourceNo: str, resourceType='thumbnail', thumbType='thumbnail.jpg'):
+        url = 'https://files.mybox.naver.com/file/download.api?resourceKey=' + resourceKey + '&resourceType=thumbnail&thumbType=thumbnail.png'
+        return await self._save_thumb(url, fileName, resourceNo)
+
+    async def get_thumb3(self, fileName: str, resourceNo: str):
+        url = 'https://thumb2.photo.mybox.naver.com/' + resourceNo + '?type=m740_390_2&recycle=' + fileName + '_' + resourceNo + '&origin=false'
+        return await self._save_thumb(url, fileName, resourceNo)
+
+    async def do_upload(self, toParentKey: str, resourceName: str, isRetResourceKey: bool = True, fileLocation: str = ''):
+        # check mybox.do_upload
+
+        if os.path.exists(fileLocation) == False:
+            self._logger.error("Can't find file location")
+            return None
+
+        with open(fileLocation, 'rb') as f:
+            data = f.read()
+
+        # Call checkupload.api and check status
+        status = (await self.post('https://files.mybox.naver.com/file/checkupload.api')).status_code
+        self._logger.debug('uploadCheck API: {}'.format(status))
+
+        if status != 200:
+            self._logger.error('Upload Failed')
+            return None
+
+        query = {'toParentKey': toParentKey,
+                 'resourceName': parse.quote(resourceName),
+                 'lastModified':  parse.quote(time.strftime('%Y-%m-%dT%X+09:00', time.localtime(time.time()))),
+                 'isRetResourceKey': 'true' if isRetResourceKey is True else 'false',
+                 'linkAction': 'false',
+                 'writeMode': 'none',
+                 'filesize': len(data)}
+
+        header_for_upload = self.headers.copy()
+        del header_for_upload['content-type']
+        uploaded = await self.post('https://files.mybox.naver.com/file/upload.api', files={'Filedata': data}, data=query, headers=header_for_upload)
+        self._logger.info('File uploaded Name: {}'.format(resourceName))
+        return uploaded
+
+    async def get_image_info(self, fileId: int, catalogType='folder'):
+        userIdx = await self.get_userIdx()
+        query = {'fileId': str(fileId) + ':' + str(userIdx),
+                 'catalogType': catalogType}
+
+        return await self.post('https://photo.mybox.naver.com/api/imageProperty/getImageInfo', data=parse.urlencode(query))
+
+    async def get_userIdx(self):
+        user_info = (await self.get_user_info()).json()
+
+        self._logger.debug(user_info)
+
+        return user_info['result']['userIdx']
+
+    async def paginate(self, api, *args, pagingRow=200, prefetch: bool = True, **kargs):
+        # async generator version of mybox.paginate
+        # async for item in mb.iter_list(resourceKey=key): ...
+        async def fetch(startNum):
+            return (await api(*args, startNum=startNum, pagingRow=pagingRow, **kargs)).json()['result']
+
+        next_page = None
+        try:
+            startNum = 0
+            result = await fetch(startNum)
+            while True:
+                items = result.get('list') or []
+                startNum += len(items)
+                totalCount = result.get('totalCount')
+
+                if totalCount is not None:
+                    last = len(items) == 0 or startNum >= totalCount
+                else:
+                    last = len(items) < pagingRow
+
+                if not last and prefetch:
+                    next_page = asyncio.ensure_future(fetch(startNum))
+
+                for item in items:
+                    yield item
+
+                if last:
+                    return
+                result = await next_page if next_page is not None else await fetch(startNum)
+                next_page = None
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def get_root_resourceKey(self):
+        ret = (await self.get_root_info()).json()
+        return ret['result']['resourceKey']
+
+    async def download_file(self, resourceKey: str, fileName: Tuple[str, None] = None, resourceType: Literal[None, 'version'] = None):
+        # check mybox.download_file
+
+        savePath = os.path.join(self._save_path, 'download/')
+        if fileName is None:
+            self._logger.debug("File name is None. Trying to search fileName...")
+            try:
+                fileName = (await self.get_metadata(resourceKey)).json()['result']['resourcePath'].split('/')[-1]
+                self._logger.debug("File found file name: {}".format(fileName))
+            except Exception as e:
+                self._logger.error('get file name failed: {}'.format(e))
+                fileName = resourceKey
+
+        query = {'NDriveSvcType': 'NHN/ND-WEB Ver',
+                 'resourceKey': resourceKey}
+
+        url = 'https://files.mybox.naver.com/file/download.api?{}'.format(parse.urlencode(query))
+
+        if os.path.exists(savePath) == False:
+            os.makedirs(savePath, exist_ok=True)
+
+        ret = await self._save(url, savePath + fileName)
+        self._logger.info("File Downloaded Size: {} Filename: {} Path: {}".format(ret, fileName, savePath + fileName))
+        return True
@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import random
+import timeit
+from urllib import parse
+
+from usage import CloudCollectMybox
+
+
+'''
+Microbenchmark of listing page conversion (CloudCollectMybox._generate_resources)
+
+Compares per node cost of
+- legacy: old per node _generate_common_data (list scans, strftime, urlencode for every node)
+- batch: _generate_resources for a whole page
+- batch + to_dict: batch conversion and output format
+
+--- usage ---
+python bench.py [number of nodes]
+'''
+
+
+def make_page(n: int) -> list:
+    random.seed(0)
+    exts = ['jpg', 'png', 'pdf', 'docx', 'mp4', 'mp3', 'zip', 'txt', 'heic']
+    t = 1688463863000
+    page = []
+    for i in range(n):
+        node = {'resourceKey': 'Z2FuZ2pld' + str(i),
+                'resourcePath': '/photos/2021/IMG_{}.{}'.format(i, random.choice(exts)),
+                'resourceNo': 200224974 + i,
+                'resourceType': 'file',
+                'resourceSize': random.randint(0, 10 ** 8),
+                'createDate': t - i * 1000,
+                'updateDate': t - i * 500,
+                'accessDate': t,
+                'updateUser': 'gangjeuk',
+                'isThumbnail': i % 2 == 0,
+                'linkShare': None,
+                'memberShare': None}
+        if i % 10 == 0:
+            node['resourceType'] = 'folder'
+            node['resourcePath'] = '/photos/2021/dir_{}/'.format(i)
+        page.append(node)
+    return page
+
+
+def legacy_generate_common_data(self, data_node):
+    # _generate_common_data before batch conversion. kept only for comparison
+    ownerId = data_node.get('ownderId', data_node.get('updateUser', 0))
+    if 'resourcePath' in data_node:
+        if data_node['resourceType'] == 'folder':
+            name = data_node['resourcePath'].split('/')[-2]
+        else:
+            name = data_node['resourcePath'].split('/')[-1]
+    else:
+        name = data_node.get('resourceName', '')
+    ext = ''
+    fileType = ''
+    if name.find('.') != -1:
+        tail = name.split('.')[-1]
+        if tail.upper() in CloudCollectMybox.DOCUMENT_FORMAT:
+            ext = tail
+            fileType = 'document'
+        elif tail.upper() in CloudCollectMybox.IMAGE_FORMAT:
+            ext = tail
+            fileType = 'picture'
+    else:
+        fileType = 'folder' if data_node['resourceType'] == 'folder' else 'file'
+    query = {'NDriveSvcType': 'NHN/ND-WEB Ver',
+             'resourceKey': data_node['resourceKey']}
+    download_url = 'https://files.mybox.naver.com/file/download.api?{}'.format(parse.urlencode(query))
+    shared = data_node.get('memberShare') is not None or data_node.get('linkShare') is not None
+    fileId = str(data_node.get('resourceNo', 0))
+    return {'common': {
+        'file_id': fileId,
+        'download_url': download_url if fileType != 'folder' and 'deleteDate' not in data_node else '',
+        'type': fileType,
+        'name': name,
+        'size': data_node.get('resourceSize', 0),
+        'ext': ext,
+        'ctime': time.strftime('%Y-%m-%d %X', time.localtime(data_node.get('createDate', 1)/1000)),
+        'mtime': time.strftime('%Y-%m-%d %X', time.localtime(data_node.get('updateDate', 1)/1000)),
+        'owner': ownerId,
+        'history_count': 0,
+        'shared': shared,
+        'thumbnail': os.path.join(self._savepath, '.thumbnail/', (name + '_' + fileId + '.jpg')) if data_node.get('isThumbnail') == True else '',
+        },
+        'accessDate': time.strftime('%Y-%m-%d %X', time.localtime(data_node.get('accessDate', 1)/1000)),
+        'isProtected': data_node.get('isProtected', False),
+        'isPasswordLocked': data_node.get('isPasswordLocked', False),
+        'resourcePath': data_node.get('resourcePath', False),
+        'resourceKey': data_node.get('resourceKey', False)
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    page = make_page(n)
+    m = CloudCollectMybox.__new__(CloudCollectMybox)
+    m._savepath = './'
+    m._thumbnail_dir = os.path.join('./', '.thumbnail/')
+
+    cases = {
+        'legacy': lambda: [legacy_generate_common_data(m, i) for i in page],
+        'batch': lambda: m._generate_resources(page),
+        'batch + to_dict': lambda: [i.to_dict() for i in m._generate_resources(page)],
+    }
+
+    print('nodes per page: {}'.format(n))
+    for name, case in cases.items():
+        number = max(1, 20000 // n)
+        best = min(timeit.repeat(case, number=number, repeat=5)) / number
+        print('{:<16} {:8.2f} us/node'.format(name, best / n * 10 ** 6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from log import set_logger
+from mybox_resource import Resource
+from jsonfile import load_json, save_json
+
+
+'''
+Folder crawler for MYBOX.
+
+Folders are listed breadth-first by a pool of workers.
+Result is nested list of Resource (check mybox_resource.py)
+    [ Resource(files=[ Resource, ... ]), ... ]
+
+Order of the files in a folder is kept because the listing of a folder
+is always converted at once by the coordinator thread.
+
+--- usage ---
+crawler = FolderCrawler(mb, convert=collector._generate_resources, workers=8)
+files = crawler.crawl(list(mb.iter_list(resourceKey='root')), [], False)
+'''
+
+
+class FolderCrawler:
+
+    def __init__(self, mb, convert, workers: int = 8, on_file=None, on_node=None, lister=None, checkpoint=None, on_checkpoint=None, collect: bool = True):
+        # mb: mybox instance
+        # convert: function which converts list of API data nodes(listing page) to list of Resource
+        # on_file: called with Resource of every file (not folder) e.g) thumbnail download
+        # on_node: called with (API data node, Resource) of every file and folder e.g) indexing
+        # lister: function which returns children nodes of folder node. e.g) IncrementalLister
+        # checkpoint: CrawlCheckpoint to save progress
+        # on_checkpoint: called before checkpoint is saved e.g) commit index
+        # collect: if False Resource is not kept in the tree. use on_node to get the data (streaming)
+        self.mb = mb
+        self._convert = convert
+        self._workers = workers
+        self._on_file = on_file
+        self._on_node = on_node
+        self._list = lister if lister is not None else self._list_folder
+        self._checkpoint = checkpoint
+        self._on_checkpoint = on_checkpoint
+        self._collect = collect
+        self._logger = set_logger(None)
+
+    def _list_folder(self, folder_node: dict) -> list:
+        # runs on worker thread
+        return list(self.mb.iter_list(resourceKey=folder_node['resourceKey']))
+
+    def _restore(self, state: dict, parent: list) -> list:
+        # put the saved tree into parent and find the folders of the frontier in it
+        parent.extend(Resource.from_record(i) for i in state['tree'])
+
+        folders = {}
+        stack = list(parent)
+        while stack:
+            resource = stack.pop()
+            if resource.files is not None:
+                folders[resource.resourceKey] = resource
+                stack.extend(resource.files)
+
+        ret = []
+        for node, shared in state['frontier']:
+            if node['resourceKey'] in folders:
+                resource = folders[node['resourceKey']]
+            else:
+                # tree is not collected
+                resource = self._convert([node])[0]
+                resource.shared = shared
+                resource.files = []
+            ret.append((node, resource))
+        return ret
+
+    def crawl(self, folder_list: list, parent: list, parent_dir_is_shared: bool, resume: bool = False) -> list:
+        # resume: continue from the checkpoint instead of folder_list if checkpoint exists
+        pending = {}
+
+        with ThreadPoolExecutor(max_workers=self._workers) as pool:
+
+            def expand(nodes, parent, parent_dir_is_shared):
+                # returns folders to list. parent is changed only when every node is converted
+                files = []
+                folders = []
+                for i, resource in zip(nodes, self._convert(nodes)):
+                    if parent_dir_is_shared == True:
+                        resource.shared = True
+                    if i['resourceType'] == 'folder':
+                        resource.files = []
+                        folders.append((i, resource))
+                    elif self._on_file is not None:
+                        self._on_file(resource)
+                    if self._on_node is not None:
+                        self._on_node(i, resource)
+                    if self._collect:
+                        files.append(resource)
+                parent.extend(files)
+                return folders
+
+            def submit(folders):
+                for node, resource in folders:
+                    pending[pool.submit(self._list, node)] = (node, resource)
+
+            def save():
+                if self._on_checkpoint is not None:
+                    self._on_checkpoint()
+                self._checkpoint.save([i.to_record() for i in parent], [(node, resource.shared) for node, resource in pending.values()])
+
+            state = self._checkpoint.load() if resume and self._checkpoint is not None else None
+
+            try:
+                if state is not None:
+                    self._logger.info("Resume crawling from checkpoint. frontier: {}".format(len(state['frontier'])))
+                    submit(self._restore(state, parent))
+                else:
+                    submit(expand(folder_list, parent, parent_dir_is_shared))
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        node, resource = pending[future]
+                        submit(expand(future.result(), resource.files, resource.shared))
+                        del pending[future]
+
+                    if self._checkpoint is not None and self._checkpoint.due():
+                        save()
+            except BaseException:
+                # don't list remaining folders when one of them failed
+                pool.shutdown(wait=False, cancel_futures=True)
+                if self._checkpoint is not None:
+                    save()
+                    self._logger.error("Crawling failed. checkpoint saved at: {}".format(self._checkpoint.path))
+                raise
+
+            if self._checkpoint is not None:
+                self._checkpoint.remove()
+            self._logger.debug("Crawling done. connection stats: {}".format(self.mb.connection_stats()))
+
+        return parent
+
+
+class CrawlCheckpoint:
+    """
+    Checkpoint file of FolderCrawler.
+
+    The partial tree and the frontier(folders which are not listed yet)
+    are saved at intervals and when the crawl fails,
+    so the next run can resume from there. (usage.py --resume)
+    {
+        tree: [ ... ]       -> Resource.to_record of the result of crawl
+        frontier: [ ... ]   -> [API data node, shared] of folders to list
+        savedAt: int
+    }
+    """
+
+    def __init__(self, path: str, interval: int = 60):
+        # interval: seconds between saves
+        self.path = path
+        self._interval = interval
+        self._saved = time.time()
+        self._logger = set_logger(None)
+
+    def due(self) -> bool:
+        return time.time() - self._saved >= self._interval
+
+    def load(self):
+        return load_json(self.path, self._logger, 'checkpoint')
+
+    def save(self, tree: list, frontier: list):
+        save_json(self.path, {'tree': tree, 'frontier': frontier, 'savedAt': int(time.time())})
+        self._saved = time.time()
+        self._logger.debug("Checkpoint saved. frontier: {}".format(len(frontier)))
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class IncrementalLister:
+    """
+    Lister for FolderCrawler which reuses the listing of the last crawl.
+
+    Folder whose updateDate is same with the snapshot(DriveIndex) is not listed again.
+    Children of the folder are taken from the snapshot.
+
+    verify_folders == False
+        child folders of reused folder are also taken from the snapshot,
+        so the whole subtree is reused without any request.
+        This trusts that MYBOX updates updateDate of the folder when something under it changes.
+    verify_folders == True
+        metadata of every child folder of reused folder is fetched again(get_metadata),
+        so the change of deeper folder is always found. One request per folder.
+    """
+
+    def __init__(self, mb, index, verify_folders: bool = False):
+        self.mb = mb
+        self._index = index
+        self._verify_folders = verify_folders
+        # snapshot should be read before the crawl overwrites it
+        self._dates = index.folder_dates()
+        self._lock = threading.Lock()
+        self.listed = 0
+        self.reused = 0
+
+    def _unchanged(self, folder_node: dict) -> bool:
+        updateDate = folder_node.get('updateDate')
+        return updateDate is not None and self._dates.get(folder_node['resourceKey']) == updateDate
+
+    def __call__(self, folder_node: dict) -> list:
+        resourceKey = folder_node['resourceKey']
+
+        if self._unchanged(folder_node):
+            children = self._index.children_nodes(resourceKey)
+            if children:
+                if self._verify_folders:
+                    children = [self.mb.get_metadata(i['resourceKey']).json()['result'] if i['resourceType'] == 'folder' else i for i in children]
+                with self._lock:
+                    self.reused += 1
+                return children
+
+        with self._lock:
+            self.listed += 1
+        return list(self.mb.iter_list(resourceKey=resourceKey))
@@ -0,0 +1,242 @@
+import json
+import sqlite3
+import threading
+
+from log import set_logger
+
+
+'''
+Local SQLite index of MYBOX drive.
+
+Index is filled from crawl results (check usage.py --index option)
+and can be queried without touching the network.
+
+--- usage ---
+with DriveIndex('./mybox.db') as index:
+    index.under('/photos/2021')
+    index.query(ext='pdf', min_size=10 * 1024 * 1024)
+'''
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS resources (
+    resourceKey     TEXT PRIMARY KEY,
+    parentKey       TEXT,
+    resourcePath    TEXT,
+    name            TEXT,
+    ext             TEXT,
+    resourceType    TEXT,
+    resourceNo      INTEGER,
+    size            INTEGER,
+    createDate      INTEGER,
+    updateDate      INTEGER,
+    accessDate      INTEGER,
+    shared          INTEGER,
+    isThumbnail     INTEGER,
+    thumbnail       TEXT,
+    node            TEXT,
+    crawlId         INTEGER
+);
+CREATE INDEX IF NOT EXISTS resources_path ON resources (resourcePath);
+CREATE INDEX IF NOT EXISTS resources_parent ON resources (parentKey);
+CREATE INDEX IF NOT EXISTS resources_ext ON resources (ext);
+CREATE INDEX IF NOT EXISTS resources_mtime ON resources (updateDate);
+'''
+
+_COLUMNS = ['resourceKey', 'parentKey', 'resourcePath', 'name', 'ext', 'resourceType', 'resourceNo',
+            'size', 'createDate', 'updateDate', 'accessDate', 'shared', 'isThumbnail', 'thumbnail', 'node', 'crawlId']
+
+
+def _name_and_ext(node: dict):
+    path = node.get('resourcePath') or ''
+    name = path.rstrip('/').split('/')[-1] if path != '' else node.get('resourceName', '')
+    ext = ''
+    if node.get('resourceType') != 'folder' and name.find('.') != -1:
+        ext = name.split('.')[-1].lower()
+    return name, ext
+
+
+def _path_upper_bound(path: str) -> str:
+    # every path which starts with 'path' is smaller than this value
+    # so range query can use the index instead of LIKE
+    return path[:-1] + chr(ord(path[-1]) + 1)
+
+
+class DriveIndex:
+
+    def __init__(self, path: str, batch: int = 1000):
+        # path: sqlite database file. ':memory:' is also possible
+        # batch: number of rows written at once
+        self._logger = set_logger(None)
+        self._path = path
+        self._batch = batch
+        self._rows = []
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(_SCHEMA)
+
+        # index created by older version has no crawlId column
+        columns = [row['name'] for row in self._db.execute('PRAGMA table_info(resources)')]
+        if 'crawlId' not in columns:
+            self._db.execute('ALTER TABLE resources ADD COLUMN crawlId INTEGER')
+            self._db.commit()
+
+        self._crawl = self._db.execute('SELECT IFNULL(MAX(crawlId), 0) FROM resources').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, node: dict, shared: bool = False, thumbnail: str = ''):
+        # node: data node of API. e.g) item of get_list, get_root_info
+        name, ext = _name_and_ext(node)
+        row = (node['resourceKey'],
+               node.get('parentKey'),
+               node.get('resourcePath'),
+               name,
+               ext,
+               node.get('resourceType'),
+               node.get('resourceNo'),
+               node.get('resourceSize', 0),
+               node.get('createDate'),
+               node.get('updateDate'),
+               node.get('accessDate'),
+               1 if shared else 0,
+               1 if node.get('isThumbnail') == True else 0,
+               thumbnail,
+               json.dumps(node),
+               self._crawl)
+
+        with self._lock:
+            self._rows.append(row)
+            if len(self._rows) >= self._batch:
+                self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._db.executemany('INSERT OR REPLACE INTO resources ({}) VALUES ({})'.format(', '.join(_COLUMNS), ', '.join('?' * len(_COLUMNS))), self._rows)
+            self._db.commit()
+            self._rows = []
+
+    def commit(self):
+        with self._lock:
+            self._flush()
+
+    def begin_crawl(self):
+        # rows written after this call belong to new crawl.
+        # rows of previous crawl are kept as snapshot until end_crawl
+        with self._lock:
+            self._flush()
+            self._crawl += 1
+
+    def end_crawl(self):
+        # remove files which were not found in the crawl
+        with self._lock:
+            self._flush()
+            deleted = self._db.execute('DELETE FROM resources WHERE crawlId IS NULL OR crawlId < ?', (self._crawl,)).rowcount
+            self._db.commit()
+        self._logger.debug("{} resources removed from index".format(deleted))
+
+    def clear(self):
+        with self._lock:
+            self._rows = []
+            self._db.execute('DELETE FROM resources')
+            self._db.commit()
+
+    def close(self):
+        self.commit()
+        self._db.close()
+
+    def _select(self, where: str = '', params=(), order: str = 'resourcePath', limit: int = None) -> list:
+        sql = 'SELECT * FROM resources'
+        if where != '':
+            sql += ' WHERE ' + where
+        sql += ' ORDER BY ' + order
+        if limit is not None:
+            sql += ' LIMIT {}'.format(int(limit))
+
+        with self._lock:
+            self._flush()
+            return [dict(row) for row in self._db.execute(sql, params)]
+
+    def get(self, resourceKey: str):
+        ret = self._select('resourceKey = ?', (resourceKey,))
+        return ret[0] if ret else None
+
+    def children(self, parentKey: str) -> list:
+        return self._select('parentKey = ?', (parentKey,))
+
+    def children_nodes(self, parentKey: str) -> list:
+        # original API data nodes of children. same format with get_list
+        return [json.loads(row['node']) for row in self._select('parentKey = ?', (parentKey,), order='rowid')]
+
+    def folder_dates(self) -> dict:
+        # {resourceKey: updateDate} of every folder found by previous crawls
+        # folders already written by current crawl are not included
+        with self._lock:
+            self._flush()
+            return {row[0]: row[1] for row in self._db.execute("SELECT resourceKey, updateDate FROM resources WHERE resourceType = 'folder' AND crawlId < ?", (self._crawl,))}
+
+    def under(self, path: str) -> list:
+        # every file and folder under the path. e.g) '/photos/2021'
+        return self.query(path=path)
+
+    def query(self, path: str = None, ext: str = None, resourceType: str = None, min_size: int = None, max_size: int = None,
+              updated_after: int = None, updated_before: int = None, shared: bool = None, limit: int = None) -> list:
+        """
+        # query index
+        # path: resourcePath prefix(directory)
+        # ext: file extension. case insensitive
+        # resourceType: 'file' | 'folder'
+        # min_size-max_size: size in bytes
+        # updated_after-updated_before: updateDate in epoch ms (same as API)
+        # you can get
+        # list[
+        #       0:
+        #           resourceKey, parentKey, resourcePath, name, ext, resourceType: str
+        #           resourceNo, size, create, update, accessDate: int
+        #           shared, isThumbnail: 0 | 1
+        #           thumbnail: str      -> local thumbnail path
+        #           node: str           -> json of original API data
+        # ...
+        """
+        where = []
+        params = []
+
+        if path is not None:
+            path = path if path.endswith('/') else path + '/'
+            where.append('resourcePath >= ? AND resourcePath < ? AND resourcePath != ?')
+            params += [path, _path_upper_bound(path), path]
+        if ext is not None:
+            where.append('ext = ?')
+            params.append(ext.lstrip('.').lower())
+        if resourceType is not None:
+            where.append('resourceType = ?')
+            params.append(resourceType)
+        if min_size is not None:
+            where.append('size >= ?')
+            params.append(min_size)
+        if max_size is not None:
+            where.append('size <= ?')
+            params.append(max_size)
+        if updated_after is not None:
+            where.append('updateDate >= ?')
+            params.append(updated_after)
+        if updated_before is not None:
+            where.append('updateDate <= ?')
+            params.append(updated_before)
+        if shared is not None:
+            where.append('shared = ?')
+            params.append(1 if shared else 0)
+
+        return self._select(' AND '.join(where), params, limit=limit)
+
+    def count(self) -> int:
+        with self._lock:
+            self._flush()
+            return self._db.execute('SELECT COUNT(*) FROM resources').fetchone()[0]
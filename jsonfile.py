@@ -0,0 +1,31 @@
+import os
+import json
+
+
+'''
+JSON state files kept between runs.
+e.g) transfer manifest, .part sidecar, crawl checkpoint, thumbnail cache
+
+save_json writes to temp file and replaces, so crash while saving can't break the file.
+load_json gives None for missing or broken file, so the caller starts from empty state.
+'''
+
+
+def save_json(path: str, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def load_json(path: str, logger=None, what: str = 'file'):
+    # logger: broken file is warned with it. e.g) "Broken manifest is ignored: <path>"
+    if os.path.exists(path) == False:
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except ValueError:
+        if logger is not None:
+            logger.warning("Broken {} is ignored: {}".format(what, path))
+        return None
@@ -0,0 +1,77 @@
+import os
+import time
+import threading
+
+from log import set_logger
+from jsonfile import load_json, save_json
+
+
+'''
+Local manifest of transferred files.
+
+mybox records every download which is hashed inline
+(hash_algorithm argument of download_file) so the file can be verified later
+without reading the remote side again, and every upload so upload_tree
+can skip files which are not changed since then.
+
+--- manifest ---
+{
+    local path(absolute): {
+        direction: str          -> 'download' | 'upload'
+        resourceKey: str        -> file in MYBOX
+        size: int
+        mtime: float            -> mtime of local file when it is recorded
+        algorithm: str          -> hashlib name. e.g) sha256. None if not hashed
+        digest: str             -> hex digest. None if not hashed
+        at: float               -> time of transfer
+        parentKey: str          -> only upload. folder the file is uploaded to
+    }
+...
+}
+
+--- usage ---
+mb.set_manifest(TransferManifest('./.manifest.json'))
+digest = mb.download_file(resourceKey, hash_algorithm='sha256')
+'''
+
+
+class TransferManifest:
+
+    def __init__(self, path: str, interval: int = 5):
+        # interval: seconds between saves. record() doesn't write the file every time
+        self._logger = set_logger(None)
+        self.path = path
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._saved = time.time()
+        self._dirty = False
+        self._entries = load_json(self.path, self._logger, 'manifest') or {}
+
+    def get(self, localPath: str):
+        with self._lock:
+            return self._entries.get(os.path.abspath(localPath))
+
+    def record(self, localPath: str, direction: str, resourceKey: str, size: int, algorithm: str, digest: str, **extra):
+        # extra: other fields of the record. e.g) parentKey
+        st = os.stat(localPath)
+        with self._lock:
+            self._entries[os.path.abspath(localPath)] = {'direction': direction,
+                                                         'resourceKey': resourceKey,
+                                                         'size': size,
+                                                         'mtime': st.st_mtime,
+                                                         'algorithm': algorithm,
+                                                         'digest': digest,
+                                                         'at': time.time(),
+                                                         **extra}
+            self._dirty = True
+            due = time.time() - self._saved >= self._interval
+        if due:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            save_json(self.path, self._entries)
+            self._saved = time.time()
+            self._dirty = False
@@ -0,0 +1,100 @@
+import os
+import time
+import uuid
+
+
+'''
+Streaming multipart/form-data body for upload.
+
+requests builds multipart body in memory (files={'Filedata': data}),
+so uploading a large file needs memory of the file size at least.
+MultipartFile reads the file part chunk by chunk while requests sends the body,
+so memory use is same for any file size.
+
+--- usage ---
+body = MultipartFile({'filesize': size}, 'Filedata', './movie.mp4', on_progress=print)
+requests.post(url, data=body, headers={'content-type': body.content_type})
+'''
+
+
+class MultipartFile:
+
+    def __init__(self, fields: dict, name: str, filePath: str, fileName: str = None, chunk_size: int = 1024 * 1024,
+                 offset: int = 0, length: int = None, digest=None, on_progress=None):
+        # fields: form fields sent before the file
+        # name: form field name of the file. e.g) Filedata
+        # fileName: filename of the file part. same with name if None (same as requests files={name: data})
+        # offset, length: send only this part of the file
+        # digest: hashlib object updated with the file bytes
+        # on_progress: called with (sent bytes, total bytes, bytes per second) of the file part
+        self._filePath = filePath
+        self._chunk_size = chunk_size
+        self._offset = offset
+        self._length = length if length is not None else os.path.getsize(filePath) - offset
+        self._digest = digest
+        self._on_progress = on_progress
+
+        boundary = uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary={}'.format(boundary)
+
+        head = b''
+        for k, v in fields.items():
+            head += '--{}\r\nContent-Disposition: form-data; name="{}"\r\n\r\n{}\r\n'.format(boundary, k, v).encode('utf-8')
+        head += '--{}\r\nContent-Disposition: form-data; name="{}"; filename="{}"\r\n\r\n'.format(boundary, name, fileName if fileName is not None else name).encode('utf-8')
+        self._head = head
+        self._tail = '\r\n--{}--\r\n'.format(boundary).encode('utf-8')
+
+        self._file = None
+        self._pos = 0
+        self._sent = 0
+        self._started = None
+
+    def __len__(self):
+        # requests uses it for Content-Length instead of reading the body
+        return len(self._head) + self._length + len(self._tail)
+
+    def read(self, size: int = -1) -> bytes:
+        # http client reads the body by blocks. head, file part, tail in order
+        if size is None or size < 0:
+            size = self._chunk_size
+
+        if self._pos < len(self._head):
+            data = self._head[self._pos:self._pos + size]
+        elif self._sent < self._length:
+            data = self._read_file(min(size, self._chunk_size, self._length - self._sent))
+        else:
+            tail_pos = self._pos - len(self._head) - self._length
+            data = self._tail[tail_pos:tail_pos + size]
+            if not data:
+                self.close()
+
+        self._pos += len(data)
+        return data
+
+    def _read_file(self, size: int) -> bytes:
+        if self._file is None:
+            self._file = open(self._filePath, 'rb')
+            self._file.seek(self._offset)
+            self._started = time.monotonic()
+
+        data = self._file.read(size)
+        if not data:
+            raise IOError("File is shorter than expected: {}".format(self._filePath))
+        self._sent += len(data)
+        if self._digest is not None:
+            self._digest.update(data)
+        if self._on_progress is not None:
+            self._on_progress(self._sent, self._length, self.rate())
+        return data
+
+    def rate(self) -> float:
+        # bytes per second of the file part
+        if self._started is None:
+            return 0.0
+        elapsed = time.monotonic() - self._started
+        return self._sent / elapsed if elapsed > 0 else 0.0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,16 +1,31 @@
+import io
 import os
-import requests
 import json
+import uuid
+import threading
+import shutil
+import hashlib
+import zipfile
+import tempfile
 from typing import Union, Literal, Tuple
 from urllib import parse
+from http.client import HTTPException, IncompleteRead
+from urllib3.exceptions import ProtocolError, DecodeError, ReadTimeoutError
+from requests.exceptions import ChunkedEncodingError, ContentDecodingError, ConnectionError
 
 import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 import deco 
 from log import set_logger
 from logging import CRITICAL
 from credential import Credential
+from transport import Transport
+from manifest import TransferManifest
+from jsonfile import load_json, save_json
+from multipart import MultipartFile
+from partfile import PartFile
 
 
 '''
@@ -35,7 +50,131 @@ The comments on functions are describing
 '''
 
 
-class mybox():
+def _content_range_total(r) -> Union[int, None]:
+    # total size of partial response. e.g) Content-Range: bytes 0-1023/146515
+    # None if server sent the whole file instead
+    if r.status_code != 206:
+        return None
+    content_range = r.headers.get('Content-Range', '')
+    if '/' not in content_range or content_range.endswith('/*'):
+        raise IOError("Unknown size of partial response: {}".format(content_range))
+    return int(content_range.rsplit('/', 1)[1])
+
+
+def _validator(r) -> Union[str, None]:
+    # value for If-Range. ETag, Last-Modified if there is no strong ETag
+    etag = r.headers.get('ETag')
+    if etag is not None and not etag.startswith('W/'):
+        return etag
+    return r.headers.get('Last-Modified')
+
+
+def _read_into(r, buffer: bytearray):
+    # read streamed response body into the buffer. yields memoryview of the filled part of the buffer
+    # errors are raised as requests exceptions like iter_content
+    # urllib3 readinto reads new bytes and copies them, so plain body is read by
+    # readinto of http.client which fills the buffer directly
+    encoding = r.headers.get('Content-Encoding', 'identity').lower()
+    fp = getattr(r.raw, '_fp', None)
+    if encoding != 'identity' or not hasattr(fp, 'readinto'):
+        yield from _read_into_decoded(r, buffer)
+        return
+
+    view = memoryview(buffer)
+    while True:
+        try:
+            n = fp.readinto(buffer)
+        except TimeoutError as e:
+            raise ConnectionError(e)
+        except (HTTPException, OSError) as e:
+            raise ChunkedEncodingError(e)
+        if not n:
+            break
+        yield view[:n]
+    if fp.length:
+        # connection is closed before Content-Length. readinto of http.client doesn't raise it
+        raise ChunkedEncodingError(IncompleteRead(b'', fp.length))
+    # urllib3 doesn't know the body is read. give the connection back to the pool as it does
+    if fp.isclosed():
+        r.raw.release_conn()
+
+
+def _read_into_decoded(r, buffer: bytearray):
+    # compressed body is decoded by urllib3
+    r.raw.decode_content = True
+    view = memoryview(buffer)
+    while True:
+        try:
+            n = r.raw.readinto(buffer)
+        except ProtocolError as e:
+            raise ChunkedEncodingError(e)
+        except DecodeError as e:
+            raise ContentDecodingError(e)
+        except ReadTimeoutError as e:
+            raise ConnectionError(e)
+        if not n:
+            return
+        yield view[:n]
+
+
+def _hash_file(digest, filePath: str, length: int = None):
+    # update digest with first length bytes of the file. whole file if length is None
+    with open(filePath, 'rb') as f:
+        while length is None or length > 0:
+            data = f.read(1024 * 1024 if length is None else min(1024 * 1024, length))
+            if not data:
+                return
+            digest.update(data)
+            if length is not None:
+                length -= len(data)
+
+
+def _zip_member_name(info: zipfile.ZipInfo) -> str:
+    # name of zip member without directory
+    # name which is not flagged as utf-8 is decoded as cp437 by zipfile. korean zip usually uses cp949
+    name = info.filename
+    if info.flag_bits & 0x800 == 0:
+        raw = name.encode('cp437')
+        for encoding in ('utf-8', 'cp949'):
+            try:
+                name = raw.decode(encoding)
+                break
+            except UnicodeDecodeError:
+                pass
+    return name.rstrip('/').split('/')[-1]
+
+
+# name suffix of manifest of upload_large
+_PARTS_SUFFIX = '.parts.json'
+_PARTS_DIR_SUFFIX = '.parts'
+_PARTS_MANIFEST_MAX = 1024 * 1024
+
+
+def _read_parts_manifest(filePath: str) -> Union[dict, None]:
+    # manifest of upload_large if the file is one
+    with open(filePath, 'rb') as f:
+        if f.read(14) != b'{"mybox_parts"':
+            return None
+        f.seek(0)
+        try:
+            return json.load(f)
+        except ValueError:
+            return None
+
+
+def _unchanged(filePath: str, node: dict) -> bool:
+    # local file is same with API data node. compared by size and mtime(seconds)
+    try:
+        st = os.stat(filePath)
+    except FileNotFoundError:
+        return False
+    return st.st_size == node.get('resourceSize') and int(st.st_mtime) == node.get('updateDate', 0) // 1000
+
+
+class mybox_api():
+    # API functions shared by mybox and async_mybox.AsyncMybox
+    # functions here only build the request and return the response of self.get / self.post
+    # subclass gives request, paginate and self._transport
 
     cookies = {
         #'NNB': 'MRM4YDPHX4LWI',
@@ -90,12 +229,19 @@ class mybox():
         self.cookies['NID_SES'] = cookies['NID_SES']
 
 
-    def get(self, *args, **kargs):
-        return requests.get(timeout=5000, cookies= self.cookies, headers= self.headers, *args, **kargs)
+    def get(self, url: str, **kargs):
+        return self.request('GET', url, **kargs)
 
-    def post(self, *args, **kargs):
-        return requests.post(timeout=5000, cookies= self.cookies, headers= self.headers, *args, **kargs)
-    
+    def post(self, url: str, **kargs):
+        return self.request('POST', url, **kargs)
+
+    def set_host_limit(self, host: str, limit: int):
+        # limit concurrent requests per host. e.g) thumb1.photo.mybox.naver.com
+        self._transport.set_host_limit(host, limit)
+
+    def connection_stats(self):
+        # connection reuse statistics per host. check Transport.stats
+        return self._transport.stats()
 
     def get_recent_list(self, startNum=0, pagingRow=200, sort: Literal['create', 'access'] = 'access', order: Literal['desc', 'asc'] = 'desc', recentType: Literal['update', 'access'] = 'access'):
         """
@@ -140,7 +286,7 @@ class mybox():
                  'fileOption': 'all',
                  'resourceOption': 'file'}
         
-        return requests.post('https://api.mybox.naver.com/service/file/search/recent',data=query, cookies=self.cookies, headers=self.headers)
+        return self.post('https://api.mybox.naver.com/service/file/search/recent',data=query)
 
 
 
@@ -188,36 +334,22 @@ class mybox():
         query['fileOption'] = fileOption if fileOption is not None else None
         query['resourceOption'] = resourceOption if resourceOption is not None else None 
 
-        return requests.post('https://api.mybox.naver.com/service/file/list',data=query, cookies=self.cookies, headers=self.headers)
+        return self.post('https://api.mybox.naver.com/service/file/list',data=query)
     
-    def rm_by_key(self, resourceKey: str):
+    def rm_by_key(self, resourceKey: str, deleteType: Literal['normal', 'permanent'] = 'normal'):
+        # deleteType: 'normal' moves to trash, 'permanent' removes without trash
         query = {'resourceKey': resourceKey,
-                 'deleteType': 'normal'}
+                 'deleteType': deleteType}
         
         return self.post('https://files.mybox.naver.com/file/delete.api', data=query)
 
 
-    def mkdir(self, parentKey: str = 'root', dir_name: str =''):
-        query = {'resourceKey':           parentKey,
-                 'resourceName':          '새 폴더' if dir_name == '' else dir_name}
-                 #'useAutoCorrectFilename':['true' if dir_name == '' else 'false']}
-        
-        self._logger.info("mkdir: {}".format(query['resourceName']))
-
-        ret = self.post('https://files.mybox.naver.com/file/mkdir.api?{}'.format(parse.urlencode(query)))
-
-        # Code 1008 means
-        #{'code': 1008, 'message': 'Duplicated Folder Exist'
-        if ret.json()['code'] == 1008:
-            self._logger.info("Directory {} is already exists".format(query['resourceName']))
-        return ret 
-
     def mv(self, filename: str, resourceKey: str, toParentKey: str = ""):
         query = {'resourceKey':         [resourceKey],
                  'toParentKey':         ['root' if toParentKey == "" else toParentKey],
                   'resourceName':       [filename]}
 
-        return requests.get('https://files.mybox.naver.com/file/move.api?{}'.format(parse.urlencode(query)), cookies=self.cookies, headers=self.headers)
+        return self.get('https://files.mybox.naver.com/file/move.api?{}'.format(parse.urlencode(query)))
 
 
     def get_metadata(self, resourceKey: str = 'root'):
@@ -240,7 +372,7 @@ class mybox():
         """
         query = {'resourceKey':         [resourceKey]}
 
-        return requests.get('https://api.mybox.naver.com/service/file/get?{}'.format(parse.urlencode(query)), cookies=self.cookies, headers=self.headers)
+        return self.get('https://api.mybox.naver.com/service/file/get?{}'.format(parse.urlencode(query)))
 
 
     def get_count(self, resourceKey: str):
@@ -248,86 +380,11 @@ class mybox():
         # in case of directory(=resourceKey is directory) they count the number to directories
         query = {'resourceKey':         [resourceKey]}
 
-        return requests.get('https://api.mybox.naver.com/service/file/count?{}'.format(parse.urlencode(query)), cookies=self.cookies, headers=self.headers)
-
-    def get_thumb(self, fileName: str, resourceNo: str):
-        url = 'https://thumb1.photo.mybox.naver.com/' + resourceNo + '?type=m740_390_2'
-
-        savePath = os.path.join(self._save_path, '.thumbnails/')
-        if os.path.exists(savePath) == False:
-            os.mkdir(savePath)
+        return self.get('https://api.mybox.naver.com/service/file/count?{}'.format(parse.urlencode(query)))
 
-        savePath += fileName + '_' + resourceNo + '.jpg' 
-
-        ret = 0
-        r = self.get(url)
-        r.raw.decode_content = True
-        with self.get(url, stream=True) as r:
-            r.raise_for_status()
-            self._logger.debug("Save thumb at: {}".format(savePath))
-            with open(savePath, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    ret += f.write(chunk)
-        if ret == 0:
-            os.remove(savePath)
-
-        return ret
-    def get_thumb2(self, fileName: str, resourceKey: str, resourceNo: str, resourceType='thumbnail', thumbType='thumbnail.jpg'):
-        """
-        get document format(e.g. pdf, txt ...) file thumbnail
-        #       resourceType: str       -> hint for searching directory. "version" | "thumbnail"
-
-        """
-        query = {'resourceKey': [resourceKey],
-                 'resourceType': [resourceType],
-                 'thumbType': [thumbType]}
-        url = 'https://files.mybox.naver.com/file/download.api?resourceKey=' + resourceKey + '&resourceType=thumbnail&thumbType=thumbnail.png'
-        savePath = os.path.join(self._save_path, '.thumbnails/')
-        if os.path.isdir(savePath) == False:
-            os.mkdir(savePath)
-
-        savePath += fileName + '_' + resourceNo + '.jpg' 
-
-        ret = 0
-        r = self.get(url)
-        r.raw.decode_content = True
-        with self.get(url, stream=True) as r:
-            r.raise_for_status()
-            self._logger.debug("Save thumb at: {}".format(savePath))
-            with open(savePath, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    ret += f.write(chunk)
-        if ret == 0:
-            os.remove(savePath)
-        return ret
-    
-    def get_thumb3(self, fileName: str, resourceNo: str):
-        """
-
-        #       resourceType: str       -> hint for searching directory. "version" | "thumbnail"
-
-        """
-        url = 'https://thumb2.photo.mybox.naver.com/' + resourceNo + '?type=m740_390_2&recycle='+ fileName + '_' + resourceNo + '&origin=false'
-        savePath = os.path.join(self._save_path, '.thumbnails/')
-
-        if os.path.isdir(savePath) == False:
-            os.mkdir(savePath)
-
-        savePath += fileName + '_' + resourceNo + '.jpg' 
-
-        ret = 0
-        r = self.get(url)
-        r.raw.decode_content = True
-        with self.get(url, stream=True) as r:
-            r.raise_for_status()
-            self._logger.debug("Save thumb at: {}".format(savePath))
-            with open(savePath, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    ret += f.write(chunk)
-        if ret == 0:
-            os.remove(savePath)
-
-        return ret
+    def thumb_path(self, fileName: str, resourceNo: str) -> str:
+        # local path of thumbnail saved by get_thumb, get_thumb2, get_thumb3
+        return os.path.join(self._save_path, '.thumbnails/', fileName + '_' + resourceNo + '.jpg')
 
     def access_file(self, resourceKey: str):
         # do or undo star
@@ -336,7 +393,7 @@ class mybox():
         query = {'resourceKey': resourceKey,
                 'accessDate': time.strftime('%Y-%m-%dT%X+09:00', time.localtime(time.time()))}
         
-        return requests.get('https://api.mybox.naver.com/service/file/update?{}'.format(parse.urlencode(query)), cookies=self.cookies, headers=self.headers)
+        return self.get('https://api.mybox.naver.com/service/file/update?{}'.format(parse.urlencode(query)))
 
 
 
@@ -349,7 +406,7 @@ class mybox():
                 'accessDate': [time.strftime('%Y-%m-%dT%X+09:00', time.localtime(time.time()))],
                  'protected': [protected]}
         
-        return requests.get('https://api.mybox.naver.com/service/file/update?{}'.format(parse.urlencode(query)), cookies=self.cookies, headers=self.headers)
+        return self.get('https://api.mybox.naver.com/service/file/update?{}'.format(parse.urlencode(query)))
 
 
     def do_zip(self, fileName: str, resourceKeys: list):
@@ -363,85 +420,14 @@ class mybox():
         """
         query = {"resourceKeys": resourceKeys, 
                  "fileName": fileName}
-        header_for_zip = self.headers
+        header_for_zip = self.headers.copy()
         header_for_zip['content-type'] = 'application/json;charset=UTF-8'
 
         # replace ['] to ["]
-        return requests.post('https://zip.mybox.naver.com/compression/zip', data=query.__repr__().replace("'", '"'), cookies=self.cookies, headers=header_for_zip)
-
-
-    
-    def do_upload(self, toParentKey: str, resourceName: str, isRetResourceKey: bool = True, fileLocation: str = ''):
-        """
-        # https://files.mybox.naver.com/file/upload.api
-        # POST
-        # do upload
-        # you can upload file
-        # !!!!ONLY Picture uploading has been tested
-        # toParentKey: str --> resourceKey of parent directory
-        # resourceName: str
-        # fileLocation: str --> location of the file you want to upload
-        # 
-        # you can get
-        # {
-        #    "code":0,
-        #    "message":"Success",
-        #    "result":{
-        #        "versionNo":"",
-        #        "virus":"N"
-        #        "resourceKey: str ---> if you check True on isRetResourceKey
-        #        }
-        #    }
-
-        """
-
-
-        if os.path.exists(fileLocation) == False:
-            self._logger.error("Can't find file location")
-            return None
-        
-        with open(fileLocation, 'rb') as f:
-            data = f.read()
-
-
-        query = {'toParentKey': toParentKey,
-                 'resourceKey': '',
-                 'resourceName': resourceName,
-                 'resourceSize': len(data),
-                 'writeMode': 'None',
-                 'lastModified': parse.quote(time.strftime('%Y-%m-%dT%X+09:00', time.localtime(time.time())))}
-        
-        # Call checkupload.api and check status
-        status = requests.post('https://files.mybox.naver.com/file/checkupload.api', cookies=self.cookies, headers=self.headers).status_code
-        self._logger.debug('uploadCheck API: {}'.format(status))
+        return self.post('https://zip.mybox.naver.com/compression/zip', data=query.__repr__().replace("'", '"'), headers=header_for_zip)
 
-        if status != 200:
-            self._logger.error('Upload Failed')
-            return None
 
-        query = {'toParentKey': toParentKey,
-                 'resourceName': parse.quote(resourceName),
-                'lastModified':  parse.quote(time.strftime('%Y-%m-%dT%X+09:00', time.localtime(time.time()))),
-                'isRetResourceKey': 'true' if isRetResourceKey is True else 'false' ,
-                'linkAction': 'false',
-                'writeMode': 'none',
-                'filesize': len(data)}
-        
-        self._logger.debug('len data: {}'.format(len(data)))
-        
     
-        header_for_upload = self.headers.copy()
-        if status == 200:
-            del header_for_upload['content-type']
-            uploaded = requests.post('https://files.mybox.naver.com/file/upload.api', files={'Filedata': data}, data=query,cookies=self.cookies, headers=header_for_upload)
-            self._logger.info('File uploaded Name: {}'.format(resourceName))
-            return uploaded
-        else:
-            self._logger.error('Upload Failed')
-            return None
-
-
-
     def do_unzip(self, resourceKey: str):
         """
         # https://zip.mybox.naver.com/compression/unzip
@@ -452,23 +438,11 @@ class mybox():
         # uploadedFolderType: str
         """
         query = {"resourceKey": resourceKey}
-        header_for_zip = self.headers
+        header_for_zip = self.headers.copy()
         header_for_zip['content-type'] = 'application/json;charset=UTF-8'
 
         # replace ['] to ["] 
-        return requests.post('https://zip.mybox.naver.com/compression/unzip', data=query.__repr__().replace("'", '"'), cookies=self.cookies, headers=header_for_zip)
-
-
-    def get_image_info(self, fileId: int, catalogType='folder'):
-        #folder_info = self.get_folder_info().json()
-        #useridx = folder_info['resultvalue']['addition']['resources']['resources'][0]['file']['ownerIdx']
-        userIdx = self.get_userIdx()
-        query = {'fileId': str(fileId) + ':' + str(userIdx),
-                 'catalogType': catalogType}
-
-        self._logger.debug(parse.urlencode(query))
-
-        return requests.post('https://photo.mybox.naver.com/api/imageProperty/getImageInfo', data=parse.urlencode(query), cookies=self.cookies, headers=self.headers)
+        return self.post('https://zip.mybox.naver.com/compression/unzip', data=query.__repr__().replace("'", '"'), headers=header_for_zip)
 
 
     def get_folder_info(self, folderPath='/', include='resourceKey'):
@@ -484,7 +458,7 @@ class mybox():
 
         self._logger.debug('https://photo.mybox.naver.com/v3/api/folder?{}'.format(parse.urlencode(query, quote_via=parse.quote)))
         
-        return requests.get('https://photo.mybox.naver.com/v3/api/folder?{}'.format(parse.urlencode(query, quote_via=parse.quote)), cookies=self.cookies, headers=self.headers)
+        return self.get('https://photo.mybox.naver.com/v3/api/folder?{}'.format(parse.urlencode(query, quote_via=parse.quote)))
                                 
 
     def get_user_info(self):
@@ -497,7 +471,7 @@ class mybox():
         # userIdx: int
         # ...
         """
-        return requests.get('https://api.mybox.naver.com/service/user/get', cookies=self.cookies, headers=self.headers)
+        return self.get('https://api.mybox.naver.com/service/user/get')
     
 
     def get_shared_users_info(self, resourceKey: str, sharedStatus='accepted'):
@@ -539,25 +513,16 @@ class mybox():
 
         return self.get('https://api.mybox.naver.com/service/addon/file/getLegacyInfo?{}'.format(parse.urlencode(query)))
 
-    def get_userIdx(self):
-        # you can use get_user_info or get_folder_info
-        # but get_user_info is less expensive
-        user_info = self.get_user_info().json()
-
-        self._logger.debug(user_info)
-
-        return user_info['result']['userIdx']
-    
     def get_share_list(self, startNum=0, pagingRow=200, sort='share', order='desc'):
-        query = {'startNum': 0,
-                 'pagingRow': 200,
+        query = {'startNum': startNum,
+                 'pagingRow': pagingRow,
                  'sort': sort,
                  'order': order}
 
         return self.get('https://api.mybox.naver.com/service/share/list?{}'.format(parse.urlencode(query)))
     def get_shared_list(self, startNum=0, pagingRow=200, sort='invite', order='asc'):
-        query = {'startNum': 0,
-                 'pagingRow': 200,
+        query = {'startNum': startNum,
+                 'pagingRow': pagingRow,
                  'sort': sort,
                  'order': order}
 
@@ -745,10 +710,6 @@ class mybox():
         return self.get('https://api.mybox.naver.com/service/quota/get')
     
 
-    def get_root_resourceKey(self):
-        ret = self.get_root_info().json()
-        return ret['result']['resourceKey']
-
     def get_info_by_resourceKey(self, resourceKey: str = ''):
         """
         # https://api.mybox.naver.com/service/file/get?resourceKey=root
@@ -948,40 +909,11 @@ class mybox():
     # end of routine for link sharing
     ####################################################################################################    
 
-    def download_file(self, resourceKey: str, fileName: Tuple[str, None] = None, resourceType: Literal[None, 'version'] = None):
-        """
-        # resourceType 
-        # if resourceType is version, means download past file 
-        """
-
-        savePath = os.path.join(self._save_path, 'download/')
-        if fileName is None:
-            # resourcePath. ex) /test/124.jpg
-            self._logger.debug("File name is None. Trying to search fileName...")
-            try:
-                fileName = self.get_metadata(resourceKey).json()['result']['resourcePath'].split('/')[-1]
-                self._logger.debug("File found file name: {}".format(fileName))
-            except Exception:
-                self._logger.error('get file name failed: ', Exception)
-                fileName = resourceKey
-
+    def _download_url(self, resourceKey: str) -> str:
         query = {'NDriveSvcType': 'NHN/ND-WEB Ver',
                 'resourceKey': resourceKey}
         
-        url = 'https://files.mybox.naver.com/file/download.api?{}'.format(parse.urlencode(query))
-
-        ret = 0
-        with self.get(url, stream=True) as r:
-            r.raise_for_status()
-            if os.path.exists(savePath) == False:
-                os.mkdir(savePath)
-
-            with open(savePath+fileName, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    ret += f.write(chunk)
-                self._logger.info("File Downloaded Size: {} Filename: {} Path: {}".format(ret, fileName, savePath + fileName))
-        return True
-
+        return 'https://files.mybox.naver.com/file/download.api?{}'.format(parse.urlencode(query))
 
     def get_file_version_list(self, resourceKey: str, startNum=0, pagingRow=200):
         """
@@ -1073,4 +1005,1102 @@ class mybox():
         return self.get('https://api.mybox.naver.com/service/file/getMovieCollection?{}'.format(parse.urlencode(query)))
 
 
+    ####################################################################################################
+    # iterators for paged API
+    # paged API returns only one page(pagingRow items) per call.
+    # iterators below fetch every page lazily until totalCount
+    # Use keyword arguments for the API parameters. e.g) iter_list(resourceKey=key)
+
+    def iter_list(self, **kargs):
+        return self.paginate(self.get_list, **kargs)
+
+    def iter_recent_list(self, **kargs):
+        return self.paginate(self.get_recent_list, **kargs)
+
+    def iter_waste_list(self, **kargs):
+        return self.paginate(self.get_waste_list, **kargs)
+
+    def iter_share_list(self, **kargs):
+        return self.paginate(self.get_share_list, **kargs)
+
+    def iter_shared_list(self, **kargs):
+        return self.paginate(self.get_shared_list, **kargs)
+
+    def iter_search(self, **kargs):
+        return self.paginate(self.do_search, **kargs)
+
+    def iter_search_with_option(self, **kargs):
+        return self.paginate(self.do_search_with_option, **kargs)
+
+    def iter_doc_collection(self, **kargs):
+        return self.paginate(self.get_doc_collection, **kargs)
+
+    def iter_movie_collection(self, **kargs):
+        return self.paginate(self.get_movie_collection, **kargs)
+
+    def iter_file_version_list(self, resourceKey: str, **kargs):
+        return self.paginate(self.get_file_version_list, resourceKey, **kargs)
+
+
+class mybox(mybox_api):
+
+    # seconds to reuse the result of checkupload.api
+    CHECK_UPLOAD_TTL = 30
+
+    def __init__(self, save_path: str = os.path.curdir, pool_size: int = 10, keep_alive: bool = True, timeout=5000):
+
+        super().__init__(save_path)
+        # every API call goes through pooled session of each host
+        self._transport = Transport(pool_size=pool_size, keep_alive=keep_alive, timeout=timeout)
+        # TransferManifest. hashed transfers are recorded if it is set
+        self._manifest = None
+        # (parentKey, folder name) -> resourceKey of folders made by get_or_mkdir
+        self._folder_keys = {}
+        self._folder_lock = threading.Lock()
+        # time of last successful checkupload.api call
+        self._checked = None
+        self._check_lock = threading.Lock()
 
+    def set_manifest(self, manifest: TransferManifest):
+        self._manifest = manifest
+
+    def request(self, method: str, url: str, **kargs):
+        kargs.setdefault('cookies', self.cookies)
+        kargs.setdefault('headers', self.headers)
+        return self._transport.request(method, url, **kargs)
+
+    def close(self):
+        if self._manifest is not None:
+            self._manifest.save()
+        self._transport.close()
+    
+
+    def mkdir(self, parentKey: str = 'root', dir_name: str =''):
+        query = {'resourceKey':           parentKey,
+                 'resourceName':          '새 폴더' if dir_name == '' else dir_name}
+                 #'useAutoCorrectFilename':['true' if dir_name == '' else 'false']}
+        
+        self._logger.info("mkdir: {}".format(query['resourceName']))
+
+        ret = self.post('https://files.mybox.naver.com/file/mkdir.api?{}'.format(parse.urlencode(query)))
+
+        # Code 1008 means
+        #{'code': 1008, 'message': 'Duplicated Folder Exist'
+        if ret.json()['code'] == 1008:
+            self._logger.info("Directory {} is already exists".format(query['resourceName']))
+        return ret 
+
+    def _save_thumb(self, url: str, fileName: str, resourceNo: str) -> int:
+        # download thumbnail once (streaming) and write it atomically
+        # returns size of thumbnail. empty thumbnail is not saved
+        savePath = self.thumb_path(fileName, resourceNo)
+        os.makedirs(os.path.dirname(savePath), exist_ok=True)
+
+        ret = 0
+        with self.get(url, stream=True) as r:
+            r.raise_for_status()
+            # temp file is made after the response is ok. failed request leaves nothing
+            fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(savePath), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in r.iter_content(chunk_size=8192):
+                        ret += f.write(chunk)
+            except BaseException:
+                os.remove(tmpPath)
+                raise
+
+        if ret == 0:
+            os.remove(tmpPath)
+        else:
+            self._logger.debug("Save thumb at: {}".format(savePath))
+            os.replace(tmpPath, savePath)
+        return ret
+
+    def get_thumb(self, fileName: str, resourceNo: str):
+        url = 'https://thumb1.photo.mybox.naver.com/' + resourceNo + '?type=m740_390_2'
+
+        return self._save_thumb(url, fileName, resourceNo)
+
+    def get_thumb2(self, fileName: str, resourceKey: str, resourceNo: str, resourceType='thumbnail', thumbType='thumbnail.jpg'):
+        """
+        get document format(e.g. pdf, txt ...) file thumbnail
+        #       resourceType: str       -> hint for searching directory. "version" | "thumbnail"
+
+        """
+        query = {'resourceKey': [resourceKey],
+                 'resourceType': [resourceType],
+                 'thumbType': [thumbType]}
+        url = 'https://files.mybox.naver.com/file/download.api?resourceKey=' + resourceKey + '&resourceType=thumbnail&thumbType=thumbnail.png'
+
+        return self._save_thumb(url, fileName, resourceNo)
+    
+    def get_thumb3(self, fileName: str, resourceNo: str):
+        """
+
+        #       resourceType: str       -> hint for searching directory. "version" | "thumbnail"
+
+        """
+        url = 'https://thumb2.photo.mybox.naver.com/' + resourceNo + '?type=m740_390_2&recycle='+ fileName + '_' + resourceNo + '&origin=false'
+
+        return self._save_thumb(url, fileName, resourceNo)
+
+    def do_upload(self, toParentKey: str, resourceName: str, isRetResourceKey: bool = True, fileLocation: str = '', hash_algorithm: str = None, on_progress=None,
+                  offset: int = 0, length: int = None, writeMode: Literal['none', 'overwrite'] = 'none', record: bool = True):
+        """
+        # https://files.mybox.naver.com/file/upload.api
+        # POST
+        # do upload
+        # you can upload file
+        # !!!!ONLY Picture uploading has been tested
+        # toParentKey: str --> resourceKey of parent directory
+        # resourceName: str
+        # fileLocation: str --> location of the file you want to upload
+        # hash_algorithm: str --> hashlib name. e.g) 'sha256'. file is hashed while it is sent
+        #                         hex digest is set to 'digest' attribute of the response (recorded in manifest if set_manifest is called)
+        # on_progress: function --> called with (sent bytes, total bytes, bytes per second) while uploading
+        # offset, length: int --> upload only this part of the file (check upload_large)
+        # writeMode: str --> 'overwrite' replaces the file of the same name. 'none' fails with code 1009 if it exists
+        # record: bool --> record the upload in manifest (set_manifest). False for temporary file
+        # file is streamed from disk by chunks (check multipart.py), so memory use doesn't depend on the file size
+        # 
+        # you can get
+        # {
+        #    "code":0,
+        #    "message":"Success",
+        #    "result":{
+        #        "versionNo":"",
+        #        "virus":"N"
+        #        "resourceKey: str ---> if you check True on isRetResourceKey
+        #        }
+        #    }
+
+        """
+
+
+        if os.path.exists(fileLocation) == False:
+            self._logger.error("Can't find file location")
+            return None
+        
+        size = length if length is not None else os.path.getsize(fileLocation) - offset
+
+
+        query = {'toParentKey': toParentKey,
+                 'resourceKey': '',
+                 'resourceName': resourceName,
+                 'resourceSize': size,
+                 'writeMode': 'None',
+                 'lastModified': parse.quote(time.strftime('%Y-%m-%dT%X+09:00', time.localtime(time.time())))}
+        
+        # Call checkupload.api and check status
+        # result is reused in this session for a while (check _check_upload)
+        status, cached = self._check_upload()
+        self._logger.debug('uploadCheck API: {}{}'.format(status, ' (cached)' if cached else ''))
+
+        if status != 200:
+            self._logger.error('Upload Failed')
+            return None
+
+        query = {'toParentKey': toParentKey,
+                 'resourceName': parse.quote(resourceName),
+                'lastModified':  parse.quote(time.strftime('%Y-%m-%dT%X+09:00', time.localtime(time.time()))),
+                'isRetResourceKey': 'true' if isRetResourceKey is True else 'false' ,
+                'linkAction': 'false',
+                'writeMode': writeMode,
+                'filesize': size}
+        
+        self._logger.debug('len data: {}'.format(size))
+        
+    
+        header_for_upload = self.headers.copy()
+        if status == 200:
+            while True:
+                digest = hashlib.new(hash_algorithm) if hash_algorithm is not None else None
+                body = MultipartFile(query, 'Filedata', fileLocation, offset=offset, length=size, digest=digest, on_progress=on_progress)
+                header_for_upload['content-type'] = body.content_type
+                try:
+                    uploaded = self.post('https://files.mybox.naver.com/file/upload.api', data=body, headers=header_for_upload)
+                finally:
+                    body.close()
+                if uploaded.status_code == 200 or not cached:
+                    break
+
+                # cached check may be stale. check again and retry once
+                self._logger.debug('Upload failed with cached uploadCheck. check again')
+                status, cached = self._check_upload(refresh=True)
+                if status != 200:
+                    self._logger.error('Upload Failed')
+                    return None
+            self._logger.info('File uploaded Name: {} Size: {} Speed: {:.0f} bytes/s'.format(resourceName, size, body.rate()))
+            if digest is not None:
+                uploaded.digest = digest.hexdigest()
+            if record and offset == 0 and length is None:
+                self._record_upload(fileLocation, toParentKey, uploaded, size, digest)
+            return uploaded
+        else:
+            self._logger.error('Upload Failed')
+            return None
+
+
+
+    def _check_upload(self, refresh: bool = False):
+        # call checkupload.api at most once per CHECK_UPLOAD_TTL seconds
+        # failed check is not cached. refresh: ignore cached result
+        # returns (status code, True if cached result)
+        with self._check_lock:
+            if not refresh and self._checked is not None and time.monotonic() - self._checked < mybox.CHECK_UPLOAD_TTL:
+                return 200, True
+            status = self.post('https://files.mybox.naver.com/file/checkupload.api').status_code
+            self._checked = time.monotonic() if status == 200 else None
+            return status, False
+
+    def _record_upload(self, fileLocation: str, toParentKey: str, uploaded, size: int, digest):
+        # every successful upload is recorded, so upload_tree can skip it next time
+        if self._manifest is None or uploaded.status_code != 200:
+            return
+        try:
+            result = uploaded.json()
+        except ValueError:
+            return
+        if result.get('code') != 0:
+            return
+        self._manifest.record(fileLocation, 'upload', result['result'].get('resourceKey'), size,
+                              digest.name if digest is not None else None,
+                              digest.hexdigest() if digest is not None else None,
+                              parentKey=toParentKey)
+
+    def _upload_unchanged(self, filePath: str, toParentKey: str, hash_algorithm: str = None) -> bool:
+        # True if the file is uploaded to the folder already and not changed since then (manifest)
+        # file whose mtime is changed but content is same is found by hash, if the record has it
+        if self._manifest is None:
+            return False
+        entry = self._manifest.get(filePath)
+        if entry is None or entry['direction'] != 'upload' or entry.get('parentKey') != toParentKey:
+            return False
+
+        st = os.stat(filePath)
+        if st.st_size != entry['size']:
+            return False
+        if st.st_mtime == entry['mtime']:
+            return True
+        if hash_algorithm is None or entry['algorithm'] != hash_algorithm or entry['digest'] is None:
+            return False
+
+        digest = hashlib.new(hash_algorithm)
+        _hash_file(digest, filePath)
+        if digest.hexdigest() != entry['digest']:
+            return False
+        self._manifest.record(filePath, 'upload', entry['resourceKey'], entry['size'], entry['algorithm'], entry['digest'], parentKey=toParentKey)
+        return True
+
+    def _upload_replace(self, toParentKey: str, filePath: str, hash_algorithm: str = None):
+        # upload file. the file uploaded to the folder before (manifest) has changed,
+        # so the old one is overwritten instead of failing with code 1009
+        name = os.path.basename(filePath)
+        entry = self._manifest.get(filePath) if self._manifest is not None else None
+        if entry is None or entry['direction'] != 'upload' or entry.get('parentKey') != toParentKey:
+            return self.do_upload(toParentKey, name, fileLocation=filePath, hash_algorithm=hash_algorithm)
+
+        return self._upload_over(toParentKey, name, filePath, oldKey=entry['resourceKey'], hash_algorithm=hash_algorithm)
+
+    def upload_large(self, toParentKey: str, resourceName: str, fileLocation: str, part_size: int = 256 * 1024 * 1024, hash_algorithm: str = 'sha256'):
+        """
+        # upload large file as numbered parts which can be resumed after failure
+        # upload.api takes the whole file in one request and has no chunk or append mode,
+        # so the file is stored as below and download_file joins the parts again
+        #       <resourceName>.parts/<version>/part00000, part00001 ...  -> part_size bytes of the file each
+        #       <resourceName>.parts.json                                -> manifest of parts. uploaded last
+        # every upload of the file has its own <version> folder, so the manifest of the last upload
+        # keeps working until it is replaced. parts of the older versions are moved to trash after that
+        # progress is saved in <save_path>/.uploads/, and parts uploaded already are skipped on the next call
+        # file smaller than part_size is uploaded by do_upload
+        #       hash_algorithm: str     -> every part is hashed and checked when it is downloaded
+        # you can get
+        # response of do_upload of the manifest. (code 0)
+        # IOError is raised if any upload fails. run again to resume
+        """
+        st = os.stat(fileLocation)
+        if st.st_size <= part_size:
+            return self.do_upload(toParentKey, resourceName, fileLocation=fileLocation, hash_algorithm=hash_algorithm)
+
+        statePath = os.path.join(self._save_path, '.uploads', hashlib.sha1(os.path.abspath(fileLocation).encode('utf-8')).hexdigest() + '.json')
+        target = {'toParentKey': toParentKey, 'resourceName': resourceName, 'size': st.st_size, 'mtime': st.st_mtime, 'part_size': part_size}
+        state = dict(target, version=uuid.uuid4().hex, parts={})
+        saved = load_json(statePath, self._logger, 'upload state')
+        if saved is not None:
+            # progress of the other version of the file is not used
+            if all(saved.get(k) == v for k, v in target.items()) and 'version' in saved:
+                state = saved
+                self._logger.info("Resume upload: {} parts done".format(len(state['parts'])))
+        os.makedirs(os.path.dirname(statePath), exist_ok=True)
+
+        partsKey = self.get_or_mkdir(toParentKey, resourceName + _PARTS_DIR_SUFFIX)
+        folderKey = self.get_or_mkdir(partsKey, state['version'])
+        for i, offset in enumerate(range(0, st.st_size, part_size)):
+            if str(i) in state['parts']:
+                continue
+            partName = 'part{:05d}'.format(i)
+            length = min(part_size, st.st_size - offset)
+            # part of broken try may be there. its content is unknown
+            uploaded = self._upload_over(folderKey, partName, fileLocation, hash_algorithm=hash_algorithm, offset=offset, length=length)
+            if uploaded is None or uploaded.json()['code'] != 0:
+                raise IOError("Upload of {} failed. run again to resume".format(partName))
+
+            state['parts'][str(i)] = {'resourceKey': uploaded.json()['result']['resourceKey'],
+                                      'offset': offset,
+                                      'size': length,
+                                      'digest': getattr(uploaded, 'digest', None)}
+            save_json(statePath, state)
+
+        manifest = {'mybox_parts': 1,
+                    'name': resourceName,
+                    'size': st.st_size,
+                    'algorithm': hash_algorithm,
+                    'parts': [state['parts'][str(i)] for i in range(len(state['parts']))]}
+        fd, manifestPath = tempfile.mkstemp(suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f)
+            # every part is uploaded. now the manifest of the last upload can be replaced
+            uploaded = self._upload_over(toParentKey, resourceName + _PARTS_SUFFIX, manifestPath, record=False)
+        finally:
+            os.remove(manifestPath)
+        if uploaded is None or uploaded.json()['code'] != 0:
+            raise IOError("Upload of {} failed. run again to resume".format(resourceName + _PARTS_SUFFIX))
+        os.remove(statePath)
+
+        # parts of the older versions are not used anymore
+        try:
+            for node in self.iter_list(resourceKey=partsKey):
+                if node['resourcePath'].rstrip('/').split('/')[-1] != state['version']:
+                    self.rm_by_key(node['resourceKey'])
+        except Exception as e:
+            self._logger.error("Old parts are not removed: {} ({})".format(resourceName, e))
+        return uploaded
+
+    def _upload_over(self, toParentKey: str, resourceName: str, fileLocation: str, oldKey: str = None, **kargs):
+        # upload replacing the file of the same name
+        # if overwrite is refused(code 1009), the file is removed and uploaded again
+        #       oldKey: str     -> resourceKey of the file to replace. searched by name if None
+        uploaded = self.do_upload(toParentKey, resourceName, fileLocation=fileLocation, writeMode='overwrite', **kargs)
+        if uploaded is None or uploaded.json()['code'] != 1009:
+            return uploaded
+        if oldKey is None:
+            try:
+                oldKey = self._find_child(toParentKey, resourceName, retry=1)
+            except FileNotFoundError:
+                return uploaded
+        self._logger.debug("Replace {}: {}".format(resourceName, oldKey))
+        self.rm_by_key(oldKey)
+        return self.do_upload(toParentKey, resourceName, fileLocation=fileLocation, **kargs)
+
+    def get_image_info(self, fileId: int, catalogType='folder'):
+        #folder_info = self.get_folder_info().json()
+        #useridx = folder_info['resultvalue']['addition']['resources']['resources'][0]['file']['ownerIdx']
+        userIdx = self.get_userIdx()
+        query = {'fileId': str(fileId) + ':' + str(userIdx),
+                 'catalogType': catalogType}
+
+        self._logger.debug(parse.urlencode(query))
+
+        return self.post('https://photo.mybox.naver.com/api/imageProperty/getImageInfo', data=parse.urlencode(query))
+
+
+    def get_userIdx(self):
+        # you can use get_user_info or get_folder_info
+        # but get_user_info is less expensive
+        user_info = self.get_user_info().json()
+
+        self._logger.debug(user_info)
+
+        return user_info['result']['userIdx']
+    
+    def get_root_resourceKey(self):
+        ret = self.get_root_info().json()
+        return ret['result']['resourceKey']
+
+    def _download_name(self, resourceKey: str, fileName: Tuple[str, None] = None) -> str:
+        if fileName is None:
+            # resourcePath. ex) /test/124.jpg
+            self._logger.debug("File name is None. Trying to search fileName...")
+            try:
+                fileName = self.get_metadata(resourceKey).json()['result']['resourcePath'].split('/')[-1]
+                self._logger.debug("File found file name: {}".format(fileName))
+            except Exception:
+                self._logger.error('get file name failed: ', Exception)
+                fileName = resourceKey
+        return fileName
+
+    def download_file(self, resourceKey: str, fileName: Tuple[str, None] = None, resourceType: Literal[None, 'version'] = None, saveDir: str = None,
+                      hash_algorithm: str = None, mtime: float = None):
+        """
+        # resourceType 
+        # if resourceType is version, means download past file 
+        # saveDir: directory to save the file. default is <save_path>/download/
+        # hash_algorithm: hashlib name. e.g) 'sha256'. file is hashed while it is downloaded
+        #                 and hex digest is returned instead of True (recorded in manifest if set_manifest is called)
+        # mtime: set mtime of saved file (epoch seconds)
+        # file is written to <fileName>.part and renamed when download is completed
+        # broken download is resumed from the last byte on the next call (check partfile.py)
+        """
+
+        savePath = os.path.join(saveDir if saveDir is not None else os.path.join(self._save_path, 'download'), '')
+        fileName = self._download_name(resourceKey, fileName)
+        url = self._download_url(resourceKey)
+        os.makedirs(savePath, exist_ok=True)
+
+        digest = hashlib.new(hash_algorithm) if hash_algorithm is not None else None
+        part = PartFile(savePath + fileName, resourceKey, version=mtime)
+        if not part.verifiable():
+            # nothing tells the bytes of the last try are of the same version of the file
+            part.reset()
+        start = part.offset()
+        if part.complete():
+            if digest is not None:
+                _hash_file(digest, part.path)
+            part.finish()
+            return self._finish_download(part.filePath, resourceKey, digest, mtime)
+
+        headers = self.headers if start == 0 else self._range_headers(part, 'bytes={}-'.format(start))
+        with self.get(url, stream=True, headers=headers) as r:
+            r.raise_for_status()
+            if r.status_code == 206:
+                self._logger.debug("Resume download from byte {}: {}".format(start, fileName))
+                part.set_size(_content_range_total(r))
+                if part.offset() != start or part.validator != _validator(r):
+                    # the file is modified after the last try
+                    part.reset()
+                    part.save()
+                    # response keeps the host slot of transport until it is closed
+                    r.close()
+                    return self.download_file(resourceKey, fileName, resourceType, saveDir, hash_algorithm, mtime)
+            else:
+                # server sends the whole file if If-Range doesn't match
+                start = 0
+                length = r.headers.get('Content-Length')
+                part.reset(int(length) if length is not None else None, _validator(r))
+
+            if digest is not None and start > 0:
+                # bytes of the last try are read once from .part file
+                _hash_file(digest, part.path, start)
+            pos = self._write_part(r, part, start, 8192, truncate=start == 0, digest=digest)
+
+        if part.size is not None and pos < part.size:
+            raise IOError("Incomplete download: {} of {} bytes".format(pos, part.size))
+        part.finish()
+        self._logger.info("File Downloaded Size: {} Filename: {} Path: {}".format(pos, fileName, savePath + fileName))
+        # file uploaded by upload_large
+        parts = _read_parts_manifest(part.filePath) if pos <= _PARTS_MANIFEST_MAX else None
+        if parts is not None:
+            return self._download_parts(parts, part.filePath, resourceKey, hash_algorithm, mtime)
+        return self._finish_download(part.filePath, resourceKey, digest, mtime)
+
+    def _download_parts(self, parts: dict, manifestPath: str, resourceKey: str, hash_algorithm: str = None, mtime: float = None):
+        # join parts of upload_large into one file. each part is checked with its digest
+        # saved as the name of the original file if manifest is saved with its own name(.parts.json)
+        filePath = manifestPath[:-len(_PARTS_SUFFIX)] if manifestPath.endswith(_PARTS_SUFFIX) else manifestPath
+        self._logger.info("Join {} parts: {}".format(len(parts['parts']), filePath))
+
+        # parts of every upload have their own keys
+        part = PartFile(filePath, resourceKey, version=parts['parts'][0]['resourceKey'] if parts['parts'] else None)
+        part.set_size(parts['size'])
+        part.allocate()
+        for i in parts['parts']:
+            if part.has(i['offset'], i['offset'] + i['size'] - 1):
+                continue
+            digest = hashlib.new(parts['algorithm']) if parts.get('algorithm') is not None and i.get('digest') is not None else None
+            with self.get(self._download_url(i['resourceKey']), stream=True) as r:
+                r.raise_for_status()
+                end = self._write_part(r, part, i['offset'], 64 * 1024, digest=digest)
+            if end != i['offset'] + i['size'] or (digest is not None and digest.hexdigest() != i['digest']):
+                part.reset(parts['size'])
+                part.save()
+                raise IOError("Broken part: {}".format(i['resourceKey']))
+
+        if manifestPath != filePath:
+            os.remove(manifestPath)
+        part.finish()
+
+        digest = None
+        if hash_algorithm is not None:
+            digest = hashlib.new(hash_algorithm)
+            _hash_file(digest, filePath)
+        return self._finish_download(filePath, resourceKey, digest, mtime)
+
+    def _finish_download(self, filePath: str, resourceKey: str, digest, mtime: float):
+        # returns hex digest if the file is hashed else True
+        if mtime is not None:
+            os.utime(filePath, (mtime, mtime))
+        if digest is None:
+            return True
+        if self._manifest is not None:
+            self._manifest.record(filePath, 'download', resourceKey, os.path.getsize(filePath), digest.name, digest.hexdigest())
+        return digest.hexdigest()
+
+    def _write_part(self, r, part: PartFile, start: int, chunk_size: int, truncate: bool = False, digest=None) -> int:
+        # write response body at offset start of .part file and record written bytes
+        # even if the transfer breaks. returns end offset
+        # truncate: drop old content of .part file
+        # digest: hashlib object updated with every chunk
+        pos = start
+        saved = start
+        with open(part.path, 'wb' if truncate or os.path.exists(part.path) == False else 'r+b') as f:
+            f.seek(start)
+            try:
+                for chunk in _read_into(r, bytearray(chunk_size)):
+                    pos += f.write(chunk)
+                    if digest is not None:
+                        digest.update(chunk)
+                    # sidecar is updated every 4MB, so killed process loses little
+                    if pos - saved >= 4 * 1024 * 1024:
+                        f.flush()
+                        part.add(saved, pos - 1)
+                        part.save()
+                        saved = pos
+            finally:
+                f.flush()
+                part.add(saved, pos - 1)
+                part.save()
+        return pos
+
+    def download_to(self, resourceKey: str, sink, buffer_size: int = 64 * 1024) -> int:
+        """
+        # download the file into sink instead of saving it. e.g) hashing, upload to other place
+        #       sink                -> writable binary stream(e.g. io.BytesIO) or function called with each chunk
+        #       buffer_size: int    -> size of read buffer reused for every chunk
+        # chunk is memoryview of the reused buffer and is overwritten by next read.
+        # sink should copy it (e.g. bytes(chunk)) if it keeps the data
+        # returns downloaded size
+        """
+        write = sink.write if hasattr(sink, 'write') else sink
+        url = self._download_url(resourceKey)
+
+        ret = 0
+        with self.get(url, stream=True) as r:
+            r.raise_for_status()
+            for chunk in _read_into(r, bytearray(buffer_size)):
+                write(chunk)
+                ret += len(chunk)
+        self._logger.debug("Downloaded {} bytes to sink: {}".format(ret, resourceKey))
+        return ret
+
+    def download_file_ranged(self, resourceKey: str, fileName: Tuple[str, None] = None, connections: int = 4, part_size: int = 8 * 1024 * 1024, saveDir: str = None):
+        """
+        # download large file over several connections
+        # file is split into byte ranges of part_size, which are fetched in parallel
+        # and written at their offsets of preallocated file
+        # if server ignores Range header, the file is downloaded as single stream
+        # like download_file, broken download is resumed on the next call
+        #       connections: int        -> number of concurrent range requests
+        #       part_size: int          -> bytes per range request
+        #       saveDir: str            -> directory to save the file. default is <save_path>/download/
+        """
+        savePath = os.path.join(saveDir if saveDir is not None else os.path.join(self._save_path, 'download'), '')
+        fileName = self._download_name(resourceKey, fileName)
+        url = self._download_url(resourceKey)
+        os.makedirs(savePath, exist_ok=True)
+
+        part = PartFile(savePath + fileName, resourceKey)
+        if not part.verifiable():
+            # nothing tells the bytes of the last try are of the same version of the file
+            part.reset()
+        if part.complete():
+            part.finish()
+            return True
+
+        # first missing range tells the total size
+        first = part.missing(part_size)[0] if part.size is not None else (0, part_size - 1)
+        with self.get(url, stream=True, headers=self._range_headers(part, 'bytes={}-{}'.format(*first))) as r:
+            r.raise_for_status()
+            total = _content_range_total(r)
+
+            if total is None:
+                # Range is ignored or If-Range doesn't match
+                self._logger.debug("Range is ignored. Download as single stream: {}".format(fileName))
+                part.reset(validator=_validator(r))
+                ret = self._write_part(r, part, 0, 64 * 1024, truncate=True)
+            else:
+                if part.validator != _validator(r):
+                    # the file is modified after the last try
+                    part.reset(total, _validator(r))
+                part.set_size(total)
+                part.allocate()
+                ret = self._write_part(r, part, first[0], 64 * 1024) - first[0]
+                ranges = part.missing(part_size)
+
+        if total is not None:
+            with ThreadPoolExecutor(max_workers=connections) as pool:
+                for size in pool.map(lambda i: self._download_range(url, part, *i), ranges):
+                    ret += size
+
+        if total is not None and not part.complete():
+            raise IOError("Incomplete download: {}".format(fileName))
+        part.finish()
+        self._logger.info("File Downloaded Size: {} Filename: {} Path: {}".format(ret, fileName, part.filePath))
+        return True
+
+    def _range_headers(self, part: PartFile, byte_range: str) -> dict:
+        # Range request which gets the whole file instead if the file is changed since the last response
+        headers = dict(self.headers, Range=byte_range)
+        if part.validator is not None:
+            headers['If-Range'] = part.validator
+        return headers
+
+    def _download_range(self, url: str, part: PartFile, start: int, end: int) -> int:
+        # write bytes start-end(inclusive) of the file at the same offset of .part file
+        with self.get(url, stream=True, headers=self._range_headers(part, 'bytes={}-{}'.format(start, end))) as r:
+            r.raise_for_status()
+            if r.status_code != 206:
+                raise IOError("Range request is ignored: bytes={}-{}".format(start, end))
+            ret = self._write_part(r, part, start, 64 * 1024) - start
+
+        if ret != end - start + 1:
+            raise IOError("Incomplete range: bytes={}-{} got {} bytes".format(start, end, ret))
+        return ret
+
+
+    def paginate(self, api, *args, pagingRow=200, prefetch: bool = True, **kargs):
+        """
+        # generator of every item of paged API
+        # api: paged API function. e.g) self.get_list
+        # prefetch: fetch next page while the caller consumes current page
+        """
+        def fetch(startNum):
+            return api(*args, startNum=startNum, pagingRow=pagingRow, **kargs).json()['result']
+
+        pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            startNum = 0
+            result = fetch(startNum)
+            while True:
+                items = result.get('list') or []
+                startNum += len(items)
+                totalCount = result.get('totalCount')
+
+                if totalCount is not None:
+                    last = len(items) == 0 or startNum >= totalCount
+                else:
+                    last = len(items) < pagingRow
+
+                next_page = None
+                if not last and pool is not None:
+                    next_page = pool.submit(fetch, startNum)
+
+                yield from items
+
+                if last:
+                    return
+                result = next_page.result() if next_page is not None else fetch(startNum)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    # bulk transfer
+    # folder level operations built on the functions above
+
+    def download_tree(self, resourceKey: str, dest: str, workers: int = 4, hash_algorithm: str = None, zip_below: int = 0, zip_batch: int = 100):
+        """
+        # mirror the folder to local directory dest
+        # folder hierarchy is created locally and files are downloaded by worker pool
+        # file whose local size and mtime are same with resourceSize and updateDate is skipped.
+        # mtime of downloaded file is set to updateDate, so the next call skips unchanged files
+        # file uploaded by upload_large is saved joined. its <name>.parts folder is not mirrored
+        #       workers: int        -> number of concurrent downloads
+        #       hash_algorithm: str -> hash every file while downloading. check download_file
+        #       zip_below: int      -> files smaller than this(bytes) are downloaded together by download_zipped. 0 disables
+        #       zip_batch: int      -> max number of files in one zip
+        # you can get
+        # {
+        #   downloaded: int, skipped: int, failed: int, bytes: int
+        # }
+        """
+        stats = {'downloaded': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+
+        def download(node, saveDir, fileName):
+            try:
+                self.download_file(node['resourceKey'], fileName, saveDir=saveDir, hash_algorithm=hash_algorithm, mtime=node.get('updateDate', 0) / 1000)
+            except Exception as e:
+                self._logger.error("Download failed: {} ({})".format(node.get('resourcePath'), e))
+                return {node['resourceKey']: False}
+            return {node['resourceKey']: True}
+
+        jobs = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            folders = [(resourceKey, dest)]
+            while folders:
+                folderKey, saveDir = folders.pop()
+                os.makedirs(saveDir, exist_ok=True)
+
+                small = []
+                nodes = list(self.iter_list(resourceKey=folderKey))
+                names = set(node['resourcePath'].rstrip('/').split('/')[-1] for node in nodes)
+                for node in nodes:
+                    name = node['resourcePath'].rstrip('/').split('/')[-1]
+                    if node['resourceType'] == 'folder':
+                        # parts of upload_large are downloaded by its manifest
+                        if name.endswith(_PARTS_DIR_SUFFIX) and name[:-len(_PARTS_DIR_SUFFIX)] + _PARTS_SUFFIX in names:
+                            continue
+                        folders.append((node['resourceKey'], os.path.join(saveDir, name)))
+                    elif _unchanged(os.path.join(saveDir, name), node):
+                        stats['skipped'] += 1
+                    elif name.endswith(_PARTS_SUFFIX):
+                        # joined file is saved without the suffix. manifest is never zipped, zip doesn't join it
+                        if self._parts_unchanged(node, os.path.join(saveDir, name[:-len(_PARTS_SUFFIX)])):
+                            stats['skipped'] += 1
+                        else:
+                            jobs[pool.submit(download, node, saveDir, name)] = [node]
+                    elif node.get('resourceSize', 0) < zip_below:
+                        small.append(node)
+                    else:
+                        jobs[pool.submit(download, node, saveDir, name)] = [node]
+
+                # zip is made of the files in the same folder
+                for i in range(0, len(small), zip_batch):
+                    nodes = small[i:i + zip_batch]
+                    if len(nodes) == 1:
+                        jobs[pool.submit(download, nodes[0], saveDir, nodes[0]['resourcePath'].split('/')[-1])] = nodes
+                    else:
+                        jobs[pool.submit(self.download_zipped, nodes, saveDir, hash_algorithm)] = nodes
+
+            for job, nodes in jobs.items():
+                result = job.result()
+                for node in nodes:
+                    if result[node['resourceKey']]:
+                        stats['downloaded'] += 1
+                        stats['bytes'] += node.get('resourceSize', 0)
+                    else:
+                        stats['failed'] += 1
+
+        if self._manifest is not None:
+            self._manifest.save()
+        self._logger.info("Download tree: {} -> {} {}".format(resourceKey, dest, stats))
+        return stats
+
+    def _parts_unchanged(self, node: dict, filePath: str) -> bool:
+        # file joined from parts of upload_large is same with its manifest node
+        # mtime is set to updateDate of the manifest. size is compared with the size in the manifest
+        try:
+            st = os.stat(filePath)
+        except FileNotFoundError:
+            return False
+        if int(st.st_mtime) != node.get('updateDate', 0) // 1000:
+            return False
+
+        buf = io.BytesIO()
+        self.download_to(node['resourceKey'], buf)
+        try:
+            parts = json.loads(buf.getvalue())
+        except ValueError:
+            return False
+        return isinstance(parts, dict) and parts.get('mybox_parts') is not None and parts.get('size') == st.st_size
+
+    def download_zipped(self, nodes: list, saveDir: str, hash_algorithm: str = None) -> dict:
+        """
+        # download many small files at once
+        # zip of the files is made in MYBOX(do_zip), downloaded once and extracted to saveDir.
+        # zip in MYBOX is removed after download.
+        # files which can't be taken from the zip are downloaded one by one with download_file
+        #       nodes: list         -> API data nodes of files (item of get_list). files should be in the same folder
+        #       saveDir: str        -> local directory
+        # you can get
+        # {
+        #   resourceKey: bool       -> True if downloaded
+        # ...
+        # }
+        """
+        ret = {node['resourceKey']: False for node in nodes}
+        names = {node['resourceKey']: node['resourcePath'].split('/')[-1] for node in nodes}
+        zipName = '.mybox_batch_{}.zip'.format(uuid.uuid4().hex)
+        os.makedirs(saveDir, exist_ok=True)
+
+        zipKey = None
+        tmpDir = tempfile.mkdtemp(prefix='.zip', dir=saveDir)
+        try:
+            zipped = self.do_zip(zipName, list(ret.keys()))
+            zipped.raise_for_status()
+            result = zipped.json()
+            if result['code'] != 0:
+                raise IOError("Zip failed: {}".format(result))
+
+            zipKey = self._find_child(result['result']['uploadedParentKey'], zipName)
+            self.download_file(zipKey, zipName, saveDir=tmpDir)
+
+            with zipfile.ZipFile(os.path.join(tmpDir, zipName)) as archive:
+                members = {_zip_member_name(i): i for i in archive.infolist()}
+                for node in nodes:
+                    member = members.get(names[node['resourceKey']])
+                    if member is None:
+                        continue
+                    self._extract(archive, member, os.path.join(saveDir, names[node['resourceKey']]), node, hash_algorithm)
+                    ret[node['resourceKey']] = True
+        except Exception as e:
+            self._logger.error("Zip download failed. files are downloaded one by one ({})".format(e))
+        finally:
+            shutil.rmtree(tmpDir, ignore_errors=True)
+            if zipKey is not None:
+                self._rm_temp(zipKey)
+
+        # fallback
+        for node in nodes:
+            if ret[node['resourceKey']]:
+                continue
+            try:
+                self.download_file(node['resourceKey'], names[node['resourceKey']], saveDir=saveDir, hash_algorithm=hash_algorithm, mtime=node.get('updateDate', 0) / 1000)
+                ret[node['resourceKey']] = True
+            except Exception as e:
+                self._logger.error("Download failed: {} ({})".format(node.get('resourcePath'), e))
+
+        self._logger.info("Zip download: {} of {} files".format(sum(ret.values()), len(nodes)))
+        return ret
+
+    def _rm_temp(self, resourceKey: str) -> bool:
+        # remove temporary zip in MYBOX without leaving it in trash
+        # failure is only logged. the transfer itself is already done
+        try:
+            ret = self.rm_by_key(resourceKey, deleteType='permanent')
+            ret.raise_for_status()
+            if ret.json()['code'] != 0:
+                # permanent delete is not allowed. trash is better than leaving it in the folder
+                self._logger.warning("Permanent delete failed: {} ({})".format(resourceKey, ret.json()))
+                ret = self.rm_by_key(resourceKey)
+                ret.raise_for_status()
+                if ret.json()['code'] != 0:
+                    raise IOError(ret.json())
+        except Exception as e:
+            self._logger.error("Temporary file is not removed: {} ({})".format(resourceKey, e))
+            return False
+        return True
+
+    def _find_child(self, parentKey: str, name: str, retry: int = 5) -> str:
+        # resourceKey of the file named name in the folder
+        # zip is made by server asynchronously, so it is searched a few times
+        for i in range(retry):
+            for node in self.iter_list(resourceKey=parentKey):
+                if node['resourcePath'].rstrip('/').split('/')[-1] == name:
+                    return node['resourceKey']
+            time.sleep(0.5 * (i + 1))
+        raise FileNotFoundError("{} is not found in {}".format(name, parentKey))
+
+    def _extract(self, archive: zipfile.ZipFile, member: zipfile.ZipInfo, filePath: str, node: dict, hash_algorithm: str = None):
+        # write zip member to filePath atomically with mtime of updateDate
+        digest = hashlib.new(hash_algorithm) if hash_algorithm is not None else None
+        fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(filePath), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f, archive.open(member) as src:
+                while True:
+                    data = src.read(1024 * 1024)
+                    if not data:
+                        break
+                    f.write(data)
+                    if digest is not None:
+                        digest.update(data)
+        except BaseException:
+            os.remove(tmpPath)
+            raise
+        os.replace(tmpPath, filePath)
+        self._finish_download(filePath, node['resourceKey'], digest, node.get('updateDate', 0) / 1000)
+
+    def get_or_mkdir(self, parentKey: str, dir_name: str) -> str:
+        """
+        # resourceKey of the folder dir_name in parentKey. folder is made if it doesn't exist
+        # result is cached, so each folder is made once per session
+        # mkdir code 1008(Duplicated Folder Exist) uses the key of existing folder
+        """
+        key = (parentKey, dir_name)
+        with self._folder_lock:
+            if key in self._folder_keys:
+                return self._folder_keys[key]
+
+        ret = self.mkdir(parentKey, dir_name).json()
+        if ret['code'] == 0:
+            resourceKey = ret['result']['resourceKey']
+        elif ret['code'] == 1008:
+            # response of 1008 has the key of existing folder. listing is only the fallback
+            resourceKey = (ret.get('result') or {}).get('resourceKey') or self._find_child(parentKey, dir_name, retry=1)
+        else:
+            raise IOError("mkdir failed: {} ({})".format(dir_name, ret))
+
+        with self._folder_lock:
+            self._folder_keys[key] = resourceKey
+        return resourceKey
+
+    def upload_tree(self, local_dir: str, parentKey: str = 'root', workers: int = 4, hash_algorithm: str = None, pack_below: int = 0, pack_batch: int = 100):
+        """
+        # upload local directory local_dir into the folder parentKey
+        # folders are made by get_or_mkdir(once per folder) and files are uploaded by worker pool
+        #       workers: int        -> number of concurrent uploads
+        #       hash_algorithm: str -> hash every file while uploading. check do_upload
+        #       pack_below: int     -> files smaller than this(bytes) are uploaded together by upload_packed. 0 disables
+        #       pack_batch: int     -> max number of files in one zip
+        # you can get
+        # {
+        #   folders: int, uploaded: int, skipped: int, duplicated: int, failed: int, bytes: int
+        # }
+        # duplicated: file of the same name exists in MYBOX and is not recorded in manifest (upload code 1009)
+        #             changed file which is recorded is overwritten
+        # skipped: not changed since the last upload. needs manifest (set_manifest)
+        #          compared by size and mtime, and by hash when hash_algorithm is given
+        """
+        stats = {'folders': 0, 'uploaded': 0, 'skipped': 0, 'duplicated': 0, 'failed': 0, 'bytes': 0}
+
+        def upload(folderKey, filePath):
+            try:
+                if self._upload_unchanged(filePath, folderKey, hash_algorithm):
+                    return {filePath: 'skipped'}
+                ret = self._upload_replace(folderKey, filePath, hash_algorithm)
+                code = ret.json()['code'] if ret is not None else None
+            except Exception as e:
+                self._logger.error("Upload failed: {} ({})".format(filePath, e))
+                return {filePath: 'failed'}
+            if code == 0:
+                return {filePath: 'uploaded'}
+            if code == 1009:
+                return {filePath: 'duplicated'}
+            self._logger.error("Upload failed: {} (code: {})".format(filePath, code))
+            return {filePath: 'failed'}
+
+        def upload_packed(folderKey, filePaths):
+            ret = {i: 'skipped' for i in filePaths if self._upload_unchanged(i, folderKey, hash_algorithm)}
+            # changed file uploaded before is overwritten one by one. unzip can't replace it
+            for i in filePaths:
+                entry = self._manifest.get(i) if self._manifest is not None else None
+                if i not in ret and entry is not None and entry['direction'] == 'upload' and entry.get('parentKey') == folderKey:
+                    ret.update(upload(folderKey, i))
+            filePaths = [i for i in filePaths if i not in ret]
+            if len(filePaths) == 1:
+                ret.update(upload(folderKey, filePaths[0]))
+            elif filePaths:
+                ret.update(self.upload_packed(folderKey, filePaths))
+            return ret
+
+        jobs = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            folderKeys = {os.path.abspath(local_dir): parentKey}
+            for dirpath, dirnames, filenames in os.walk(local_dir):
+                folderKey = folderKeys[os.path.abspath(dirpath)]
+                # parent folder is made before its children (top-down walk)
+                for name in dirnames:
+                    folderKeys[os.path.abspath(os.path.join(dirpath, name))] = self.get_or_mkdir(folderKey, name)
+                    stats['folders'] += 1
+
+                small = []
+                for name in filenames:
+                    filePath = os.path.join(dirpath, name)
+                    if os.path.getsize(filePath) < pack_below:
+                        small.append(filePath)
+                    else:
+                        jobs[pool.submit(upload, folderKey, filePath)] = filePath
+
+                # zip is made of the files in the same folder
+                for i in range(0, len(small), pack_batch):
+                    jobs[pool.submit(upload_packed, folderKey, small[i:i + pack_batch])] = small[i:i + pack_batch]
+
+            for job in jobs:
+                for filePath, result in job.result().items():
+                    stats[result] += 1
+                    if result == 'uploaded':
+                        stats['bytes'] += os.path.getsize(filePath)
+
+        if self._manifest is not None:
+            self._manifest.save()
+        self._logger.info("Upload tree: {} -> {} {}".format(local_dir, parentKey, stats))
+        return stats
+
+    def upload_packed(self, toParentKey: str, filePaths: list) -> dict:
+        """
+        # upload many small files at once
+        # files are zipped in a temp file, uploaded by do_upload and extracted in MYBOX by do_unzip.
+        # zip in MYBOX is removed after extraction, and extracted files are checked by name and size.
+        # only files which appear by the extraction are counted. unzip doesn't replace existing files
+        # if unzip extracts into a new folder, the files are moved to toParentKey and the folder is removed
+        # files which are not found after extraction are uploaded one by one with do_upload
+        #       filePaths: list     -> local files. names should be unique
+        # you can get
+        # {
+        #   filePath: 'uploaded' | 'duplicated' | 'failed'
+        # ...
+        # }
+        """
+        ret = {i: 'failed' for i in filePaths}
+        names = {os.path.basename(i): i for i in filePaths}
+        zipName = '.mybox_pack_{}.zip'.format(uuid.uuid4().hex)
+
+        zipKey = None
+        fd, zipPath = tempfile.mkstemp(suffix='.zip')
+        os.close(fd)
+        try:
+            # files are already compressed mostly(photo, video). store is enough
+            with zipfile.ZipFile(zipPath, 'w', zipfile.ZIP_STORED) as archive:
+                for name, filePath in names.items():
+                    archive.write(filePath, name)
+
+            uploaded = self.do_upload(toParentKey, zipName, fileLocation=zipPath, record=False)
+            if uploaded is None or uploaded.json()['code'] != 0:
+                raise IOError("Upload of zip failed")
+            zipKey = uploaded.json()['result']['resourceKey']
+
+            # file which is there before unzip(e.g. skipped or renamed by conflict) is not extracted one
+            before = set(i['resourceKey'] for i in self.iter_list(resourceKey=toParentKey))
+            unzipped = self.do_unzip(zipKey)
+            unzipped.raise_for_status()
+            result = unzipped.json()
+            if result.get('code', 0) != 0:
+                raise IOError("Unzip failed: {}".format(result))
+            parentKey = (result.get('result') or {}).get('uploadedParentKey') or toParentKey
+
+            # unzip is done by server asynchronously. wait until every file appears like _find_child
+            for i in range(5):
+                extracted = {}
+                for node in self.iter_list(resourceKey=parentKey):
+                    filePath = names.get(node['resourcePath'].rstrip('/').split('/')[-1])
+                    if filePath is None or node['resourceType'] == 'folder' or node.get('resourceSize') != os.path.getsize(filePath):
+                        continue
+                    if parentKey == toParentKey and node['resourceKey'] in before:
+                        continue
+                    extracted[filePath] = node
+                if len(extracted) == len(names):
+                    break
+                time.sleep(0.5 * (i + 1))
+
+            for filePath, node in extracted.items():
+                if parentKey != toParentKey:
+                    # extracted to the other folder. file which can't be moved is uploaded again
+                    try:
+                        moved = self.mv(os.path.basename(filePath), node['resourceKey'], toParentKey)
+                        moved.raise_for_status()
+                        if moved.json().get('code') != 0:
+                            raise IOError(moved.json())
+                    except Exception as e:
+                        self._logger.error("Move of extracted file failed: {} ({})".format(filePath, e))
+                        continue
+                ret[filePath] = 'uploaded'
+                if self._manifest is not None:
+                    self._manifest.record(filePath, 'upload', node['resourceKey'], node['resourceSize'], None, None, parentKey=toParentKey)
+
+            # folder made by unzip in the target folder
+            if parentKey != toParentKey and parentKey not in before and \
+                    any(i['resourceKey'] == parentKey for i in self.iter_list(resourceKey=toParentKey)):
+                self._rm_temp(parentKey)
+        except Exception as e:
+            self._logger.error("Packed upload failed. files are uploaded one by one ({})".format(e))
+        finally:
+            os.remove(zipPath)
+            if zipKey is not None:
+                self._rm_temp(zipKey)
+
+        # fallback
+        for filePath, result in ret.items():
+            if result == 'uploaded':
+                continue
+            try:
+                uploaded = self.do_upload(toParentKey, os.path.basename(filePath), fileLocation=filePath)
+                code = uploaded.json()['code'] if uploaded is not None else None
+            except Exception as e:
+                self._logger.error("Upload failed: {} ({})".format(filePath, e))
+                continue
+            if code == 0:
+                ret[filePath] = 'uploaded'
+            elif code == 1009:
+                ret[filePath] = 'duplicated'
+
+        self._logger.info("Packed upload: {} of {} files".format(list(ret.values()).count('uploaded'), len(filePaths)))
+        return ret
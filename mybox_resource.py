@@ -0,0 +1,166 @@
+import os
+import time
+import functools
+from urllib import parse
+
+
+'''
+Compact record of a file or folder collected from MYBOX.
+
+Resource keeps raw values of API data node (epoch ms dates, resourceNo ...)
+in __slots__ instead of the nested dict of output format.
+Dates, download URL and thumbnail path are made only when to_dict() is called.
+
+--- output format (to_dict) ---
+{
+    common: {file_id, download_url, type, name, size, ext, ctime, mtime, owner, history_count, shared, thumbnail},
+    accessDate, isProtected, isPasswordLocked, resourcePath, resourceKey,
+    inviteDate, membeShare, linkShare, deleteDate, originalPath     -> only when API data node has the field
+    files: [ ... ]                                                  -> only for folder
+}
+'''
+
+
+_DOWNLOAD_URL = 'https://files.mybox.naver.com/file/download.api?{}&resourceKey='.format(parse.urlencode({'NDriveSvcType': 'NHN/ND-WEB Ver'}))
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+
+# value of optional fields which API data node doesn't have
+# (None can't be used. e.g) linkShare is null when the file is not shared)
+MISSING = _Missing()
+
+
+@functools.lru_cache(maxsize=8192)
+def _format_second(second: int) -> str:
+    return time.strftime('%Y-%m-%d %X', time.localtime(second))
+
+
+def format_date(ms: int) -> str:
+    # files uploaded together share the same second, so formatted string is cached
+    return _format_second(int(ms // 1000))
+
+
+class Resource:
+
+    __slots__ = ('resourceKey', 'resourceNo', 'fileType', 'name', 'size', 'ext',
+                 'createDate', 'updateDate', 'accessDate', 'owner', 'shared', 'thumbnail_dir',
+                 'isProtected', 'isPasswordLocked', 'resourcePath',
+                 'inviteDate', 'membeShare', 'linkShare', 'deleteDate', 'originalPath',
+                 'files')
+
+    def __init__(self, resourceKey, resourceNo: int = 0, fileType: str = '', name: str = '', size: int = 0, ext: str = '',
+                 createDate: int = 1, updateDate: int = 1, accessDate: int = 1, owner=0, shared: bool = False, thumbnail_dir: str = '',
+                 isProtected: bool = False, isPasswordLocked: bool = False, resourcePath=False,
+                 inviteDate=MISSING, membeShare=MISSING, linkShare=MISSING, deleteDate=MISSING, originalPath=MISSING,
+                 files: list = None):
+        # thumbnail_dir: directory of thumbnail. '' if the file has no thumbnail
+        # files: children Resource list. None if it is not a folder
+        self.resourceKey = resourceKey
+        self.resourceNo = resourceNo
+        self.fileType = fileType
+        self.name = name
+        self.size = size
+        self.ext = ext
+        self.createDate = createDate
+        self.updateDate = updateDate
+        self.accessDate = accessDate
+        self.owner = owner
+        self.shared = shared
+        self.thumbnail_dir = thumbnail_dir
+        self.isProtected = isProtected
+        self.isPasswordLocked = isPasswordLocked
+        self.resourcePath = resourcePath
+        self.inviteDate = inviteDate
+        self.membeShare = membeShare
+        self.linkShare = linkShare
+        self.deleteDate = deleteDate
+        self.originalPath = originalPath
+        self.files = files
+
+    def __repr__(self):
+        return 'Resource({!r}, {!r})'.format(self.resourceKey, self.name)
+
+    @property
+    def file_id(self) -> str:
+        return str(self.resourceNo)
+
+    @property
+    def is_folder(self) -> bool:
+        return self.fileType == 'folder'
+
+    @property
+    def download_url(self) -> str:
+        if self.fileType == 'folder' or self.deleteDate is not MISSING:
+            return ''
+        # same with urlencode({'NDriveSvcType': 'NHN/ND-WEB Ver', 'resourceKey': resourceKey})
+        return _DOWNLOAD_URL + parse.quote_plus(str(self.resourceKey))
+
+    @property
+    def thumbnail(self) -> str:
+        if self.thumbnail_dir == '':
+            return ''
+        return os.path.join(self.thumbnail_dir, self.name + '_' + self.file_id + '.jpg')
+
+    def to_dict(self, files: bool = True) -> dict:
+        # files: include children of folder
+        format = {'common': {
+            'file_id': self.file_id,
+            'download_url': self.download_url,
+            'type': self.fileType,
+            'name': self.name,
+            'size': self.size,
+            'ext': self.ext,
+            'ctime': format_date(self.createDate),
+            'mtime': format_date(self.updateDate),
+            'owner': self.owner,
+            'history_count': 0,
+            'shared': self.shared,
+            'thumbnail': self.thumbnail,
+            },
+            'accessDate': format_date(self.accessDate),
+            'isProtected': self.isProtected,
+            'isPasswordLocked': self.isPasswordLocked,
+            'resourcePath': self.resourcePath,
+            'resourceKey': self.resourceKey
+        }
+
+        if self.inviteDate is not MISSING:
+            format['inviteDate'] = format_date(self.inviteDate)
+        if self.membeShare is not MISSING:
+            format['membeShare'] = self.membeShare
+        if self.linkShare is not MISSING:
+            format['linkShare'] = self.linkShare
+        if self.deleteDate is not MISSING:
+            format['deleteDate'] = format_date(self.deleteDate)
+        if self.originalPath is not MISSING:
+            format['originalPath'] = self.originalPath
+
+        if files and self.files is not None:
+            format['files'] = [i.to_dict() for i in self.files]
+
+        return format
+
+    def to_record(self) -> dict:
+        # raw values for json (e.g. checkpoint). Resource.from_record makes it back
+        record = {}
+        for k in Resource.__slots__:
+            v = getattr(self, k)
+            if k == 'files':
+                if v is not None:
+                    record[k] = [i.to_record() for i in v]
+            elif v is not MISSING:
+                record[k] = v
+        return record
+
+    @staticmethod
+    def from_record(record: dict) -> 'Resource':
+        record = dict(record)
+        if 'files' in record:
+            record['files'] = [Resource.from_record(i) for i in record['files']]
+        return Resource(**record)
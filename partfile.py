@@ -0,0 +1,127 @@
+import os
+import threading
+
+from jsonfile import load_json, save_json
+
+
+'''
+Partial file of download.
+
+File is downloaded to <file>.part and completed byte ranges are recorded
+in the sidecar <file>.part.json, so broken download can be resumed with Range requests.
+When every byte is downloaded the .part file is renamed to <file>.
+
+--- sidecar ---
+{
+    resourceKey: str        -> downloaded file. other file's sidecar is ignored
+    version                 -> e.g) updateDate of the file. sidecar of the other version is ignored
+    validator: str          -> ETag or Last-Modified of the response. sent as If-Range when resumed
+    size: int               -> total size. None if server didn't tell
+    ranges: [[start, end], ...]     -> completed byte ranges (end inclusive)
+}
+'''
+
+
+class PartFile:
+
+    def __init__(self, filePath: str, resourceKey: str, version=None):
+        # filePath: final path of downloaded file
+        # version: value which changes when the file is changed. None if unknown
+        self.filePath = filePath
+        self.path = filePath + '.part'
+        self._sidecar = self.path + '.json'
+        self._resourceKey = resourceKey
+        self._version = version
+        self._lock = threading.Lock()
+        self.size = None
+        self.validator = None
+        self.ranges = []
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self._sidecar) == False or os.path.exists(self.path) == False:
+            return
+        state = load_json(self._sidecar)
+        if state is None or state.get('resourceKey') != self._resourceKey:
+            return
+        if self._version is not None and state.get('version') != self._version:
+            return
+        self.size = state.get('size')
+        self.validator = state.get('validator')
+        self.ranges = [tuple(i) for i in state.get('ranges', [])]
+
+    def reset(self, size: int = None, validator: str = None):
+        # start again from byte 0. e.g) server ignored Range, size of the file is changed
+        with self._lock:
+            self.size = size
+            self.validator = validator
+            self.ranges = []
+
+    def verifiable(self) -> bool:
+        # downloaded bytes can be checked to be of the same version of the file
+        return self._version is not None or self.validator is not None
+
+    def set_size(self, size: int):
+        # data of the other version of the file is dropped
+        if self.size is not None and self.size != size:
+            self.reset(size)
+        self.size = size
+
+    def allocate(self):
+        # create .part file with the total size. downloaded bytes are kept
+        with open(self.path, 'r+b' if os.path.exists(self.path) else 'wb') as f:
+            if self.size is not None:
+                f.truncate(self.size)
+
+    def add(self, start: int, end: int):
+        # bytes start-end(inclusive) are written
+        if end < start:
+            return
+        with self._lock:
+            merged = []
+            for s, e in sorted(self.ranges + [(start, end)]):
+                if merged and s <= merged[-1][1] + 1:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+                else:
+                    merged.append((s, e))
+            self.ranges = merged
+
+    def offset(self) -> int:
+        # number of bytes downloaded from the beginning without a gap
+        with self._lock:
+            if self.ranges and self.ranges[0][0] == 0:
+                return self.ranges[0][1] + 1
+            return 0
+
+    def missing(self, part_size: int) -> list:
+        # byte ranges not downloaded yet, split into part_size. needs size
+        ret = []
+        with self._lock:
+            pos = 0
+            for s, e in self.ranges + [(self.size, self.size)]:
+                for start in range(pos, s, part_size):
+                    ret.append((start, min(start + part_size, s) - 1))
+                pos = max(pos, e + 1)
+        return ret
+
+    def has(self, start: int, end: int) -> bool:
+        # bytes start-end(inclusive) are downloaded
+        with self._lock:
+            return any(s <= start and end <= e for s, e in self.ranges)
+
+    def complete(self) -> bool:
+        return self.size is not None and self.offset() >= self.size
+
+    def save(self):
+        with self._lock:
+            save_json(self._sidecar, {'resourceKey': self._resourceKey,
+                                      'version': self._version,
+                                      'validator': self.validator,
+                                      'size': self.size,
+                                      'ranges': self.ranges})
+
+    def finish(self):
+        # rename completed .part file to the final path
+        os.replace(self.path, self.filePath)
+        if os.path.exists(self._sidecar):
+            os.remove(self._sidecar)
@@ -1,5 +1,7 @@
 import unittest
+import asyncio
 import mybox
+import async_mybox
 import os
 from log import set_logger
 from logging import DEBUG
@@ -239,6 +241,69 @@ class myboxTest(unittest.TestCase):
         search = self.mb.get_waste_list().json()
         self._logger.debug(search)
 
+    def test_connection_reuse(self):
+        for _ in range(3):
+            self.mb.get_user_info()
+
+        stats = self.mb.connection_stats()
+        self._logger.debug(stats)
+        api = stats['api.mybox.naver.com']
+        self.assertGreaterEqual(api['reused'], 2)
+        self.assertLess(api['connections'], api['requests'])
+
+    def test_async_get_list(self):
+        async def get_lists():
+            async with async_mybox.AsyncMybox() as amb:
+                return await asyncio.gather(amb.get_list('root'), amb.get_list(self._parentKey))
+
+        root, parent = asyncio.run(get_lists())
+        self.assertEqual(root.json()[self._CODE], self.mb.get_list('root').json()[self._CODE])
+        self.assertEqual(len(parent.json()[self._RESULT][self._LIST]), len(self.mb.get_list(self._parentKey).json()[self._RESULT][self._LIST]))
+
+    def test_iter_list(self):
+        # small pagingRow forces multiple pages
+        items = list(self.mb.iter_list(resourceKey=self._parentKey, pagingRow=2))
+        first_page = self.mb.get_list(resourceKey=self._parentKey).json()[self._RESULT][self._LIST]
+
+        self.assertEqual([i[self._RESOURCEKEY] for i in items], [i[self._RESOURCEKEY] for i in first_page])
+
+    def test_download_file_ranged(self):
+        # small part_size forces multiple range requests
+        self.mb.download_file_ranged(self.__initalize._uploaded[self.__initalize._BIRD_FILE_NAME], 'bird_ranged.jpg', part_size=16 * 1024)
+
+        downPath = os.path.join(self.mb._save_path, 'download/bird_ranged.jpg')
+        fd1 = open('./data/bird.jpg', 'rb')
+        fd2 = open(downPath, 'rb')
+
+        self.assertEqual(fd1.read(), fd2.read())
+
+        fd1.close()
+        fd2.close()
+        os.remove(downPath)
+
+    def test_upload_tree(self):
+        folderKey = self.mb.get_or_mkdir(self._parentKey, 'upload_tree')
+        # second call is served from cache
+        self.assertEqual(self.mb.get_or_mkdir(self._parentKey, 'upload_tree'), folderKey)
+
+        stats = self.mb.upload_tree('./data', folderKey)
+        self._logger.debug(stats)
+
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(stats['uploaded'] + stats['duplicated'], len(os.listdir('./data')))
+
+    def test_upload_packed(self):
+        folderKey = self.mb.get_or_mkdir(self._parentKey, 'upload_packed')
+        filePaths = [os.path.join('./data', i) for i in os.listdir('./data')]
+
+        ret = self.mb.upload_packed(folderKey, filePaths)
+        self._logger.debug(ret)
+
+        self.assertNotIn('failed', ret.values())
+        names = [i['resourcePath'].rstrip('/').split('/')[-1] for i in self.mb.iter_list(resourceKey=folderKey)]
+        # zip is removed after extraction
+        self.assertFalse([i for i in names if i.startswith('.mybox_pack_')])
+
     def test_get_thumb(self):
         return 
         info = self.mb.get_info_by_resourceKey(self.__initalize._uploaded[self.__initalize._BIRD_FILE_NAME]).json()
@@ -0,0 +1,399 @@
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+import mybox
+from crawler import FolderCrawler, CrawlCheckpoint, IncrementalLister
+from drive_index import DriveIndex
+from manifest import TransferManifest
+from multipart import MultipartFile
+from mybox_resource import Resource, MISSING
+from partfile import PartFile
+from thumbnail import ThumbnailCache, ThumbnailHints
+
+
+'''
+Tests which don't touch the network.
+test.py needs login and MYBOX account, these can run anywhere.
+
+python -m unittest test_offline
+'''
+
+
+def _node(resourceKey: str, parentKey: str, path: str, resourceType: str = 'file', size: int = 0, updateDate: int = 1000):
+    return {'resourceKey': resourceKey, 'parentKey': parentKey, 'resourcePath': path,
+            'resourceType': resourceType, 'resourceSize': size, 'updateDate': updateDate}
+
+
+def _convert(nodes: list) -> list:
+    # converter of FolderCrawler. only what the tests compare
+    return [Resource(i['resourceKey'], fileType=i['resourceType'], name=i['resourcePath'].rstrip('/').split('/')[-1]) for i in nodes]
+
+
+def _tree(resources: list) -> list:
+    return [(i.resourceKey, _tree(i.files) if i.files is not None else None) for i in resources]
+
+
+class _FakeResponse:
+
+    def __init__(self, status_code: int = 200):
+        self.status_code = status_code
+
+
+class _FakeMybox:
+    # listing of folders from a dict. counts listed folders
+
+    def __init__(self, children: dict):
+        self.children = children
+        self.listed = []
+
+    def iter_list(self, resourceKey: str):
+        self.listed.append(resourceKey)
+        return iter(self.children[resourceKey])
+
+    def connection_stats(self):
+        return {}
+
+
+class tempDirTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self._dir, name)
+
+    def write(self, name: str, data: bytes) -> str:
+        with open(self.path(name), 'wb') as f:
+            f.write(data)
+        return self.path(name)
+
+
+class driveIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = DriveIndex(':memory:')
+        self.index.begin_crawl()
+        self.index.add(_node('d1', 'root', '/photos/', 'folder'))
+        self.index.add(_node('f1', 'd1', '/photos/a.JPG', size=100))
+        self.index.add(_node('f2', 'd1', '/photos/b.pdf', size=5000))
+        self.index.add(_node('f3', 'root', '/photos2/c.jpg', size=10))
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_query_path(self):
+        # '/photos2' shares the prefix but is not under '/photos'
+        self.assertEqual([i['resourceKey'] for i in self.index.under('/photos')], ['f1', 'f2'])
+
+    def test_query_ext_and_size(self):
+        self.assertEqual([i['resourceKey'] for i in self.index.query(ext='.jpg')], ['f1', 'f3'])
+        self.assertEqual([i['resourceKey'] for i in self.index.query(min_size=100, max_size=1000)], ['f1'])
+        self.assertEqual([i['resourceKey'] for i in self.index.query(resourceType='folder')], ['d1'])
+
+    def test_end_crawl(self):
+        # files not found by the next crawl are removed
+        self.index.begin_crawl()
+        self.index.add(_node('f1', 'd1', '/photos/a.JPG', size=100))
+        self.index.end_crawl()
+        self.assertEqual(self.index.count(), 1)
+        self.assertIsNotNone(self.index.get('f1'))
+
+
+class incrementalListerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = DriveIndex(':memory:')
+        self.index.begin_crawl()
+        self.index.add(_node('d1', 'root', '/a/', 'folder', updateDate=1000))
+        self.index.add(_node('f1', 'd1', '/a/x.txt'))
+        self.index.add(_node('d2', 'root', '/b/', 'folder', updateDate=1000))
+        self.index.add(_node('f2', 'd2', '/b/y.txt'))
+        # snapshot is read by the next crawl
+        self.index.begin_crawl()
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_reuse_unchanged_folder(self):
+        mb = _FakeMybox({'d2': [_node('f3', 'd2', '/b/z.txt')]})
+        lister = IncrementalLister(mb, self.index)
+
+        self.assertEqual([i['resourceKey'] for i in lister(_node('d1', 'root', '/a/', 'folder', updateDate=1000))], ['f1'])
+        self.assertEqual([i['resourceKey'] for i in lister(_node('d2', 'root', '/b/', 'folder', updateDate=2000))], ['f3'])
+        self.assertEqual(mb.listed, ['d2'])
+        self.assertEqual((lister.reused, lister.listed), (1, 1))
+
+
+class crawlCheckpointTest(tempDirTest):
+
+    CHILDREN = {'d1': [_node('f1', 'd1', '/a/x.txt'), _node('d2', 'd1', '/a/b/', 'folder')],
+                'd2': [_node('f2', 'd2', '/a/b/y.txt')],
+                'd3': [_node('f3', 'd3', '/c/z.txt')]}
+    ROOT = [_node('d1', 'root', '/a/', 'folder'), _node('d3', 'root', '/c/', 'folder')]
+
+    def test_resume(self):
+        expected = _tree(FolderCrawler(_FakeMybox(self.CHILDREN), _convert, workers=1).crawl(self.ROOT, [], False))
+
+        def broken(node):
+            if node['resourceKey'] == 'd2':
+                raise IOError("network down")
+            return self.CHILDREN[node['resourceKey']]
+
+        checkpoint = CrawlCheckpoint(self.path('checkpoint.json'))
+        with self.assertRaises(IOError):
+            FolderCrawler(_FakeMybox(self.CHILDREN), _convert, workers=1, lister=broken, checkpoint=checkpoint).crawl(self.ROOT, [], False)
+        frontier = [node['resourceKey'] for node, shared in checkpoint.load()['frontier']]
+        self.assertIn('d2', frontier)
+        self.assertNotIn('d1', frontier)
+
+        # only the frontier is listed again
+        mb = _FakeMybox(self.CHILDREN)
+        files = FolderCrawler(mb, _convert, workers=1, checkpoint=checkpoint).crawl([], [], False, resume=True)
+        self.assertEqual(sorted(mb.listed), sorted(frontier))
+        self.assertEqual(sorted(_tree(files)), sorted(expected))
+        self.assertFalse(os.path.exists(checkpoint.path))
+
+    def test_broken_checkpoint(self):
+        with open(self.path('checkpoint.json'), 'w') as f:
+            f.write('{"tree": [')
+        self.assertIsNone(CrawlCheckpoint(self.path('checkpoint.json')).load())
+
+
+class resourceTest(unittest.TestCase):
+
+    def _old_date(self, ms: int) -> str:
+        # date format of the dict made by usage.py before Resource
+        return time.strftime('%Y-%m-%d %X', time.localtime(ms / 1000))
+
+    def test_to_dict(self):
+        resource = Resource('key=1', resourceNo=12, fileType='picture', name='a.jpg', size=10, ext='jpg',
+                            createDate=1600000000000, updateDate=1600000001000, accessDate=1600000002000, owner='me',
+                            thumbnail_dir='/save/.thumbnail/', resourcePath='/a.jpg', linkShare=None)
+        self.assertEqual(resource.to_dict(), {
+            'common': {
+                'file_id': '12',
+                'download_url': 'https://files.mybox.naver.com/file/download.api?NDriveSvcType=NHN%2FND-WEB+Ver&resourceKey=key%3D1',
+                'type': 'picture',
+                'name': 'a.jpg',
+                'size': 10,
+                'ext': 'jpg',
+                'ctime': self._old_date(1600000000000),
+                'mtime': self._old_date(1600000001000),
+                'owner': 'me',
+                'history_count': 0,
+                'shared': False,
+                'thumbnail': os.path.join('/save/.thumbnail/', 'a.jpg_12.jpg'),
+            },
+            'accessDate': self._old_date(1600000002000),
+            'isProtected': False,
+            'isPasswordLocked': False,
+            'resourcePath': '/a.jpg',
+            'resourceKey': 'key=1',
+            'linkShare': None,
+        })
+
+    def test_deleted_folder(self):
+        folder = Resource('d', fileType='folder', name='d', deleteDate=1600000000000, originalPath='/d/',
+                          files=[Resource('f', name='f')])
+        ret = folder.to_dict()
+        self.assertEqual(ret['common']['download_url'], '')
+        self.assertEqual(ret['deleteDate'], self._old_date(1600000000000))
+        self.assertEqual(ret['originalPath'], '/d/')
+        self.assertEqual([i['resourceKey'] for i in ret['files']], ['f'])
+        self.assertNotIn('inviteDate', ret)
+        self.assertNotIn('files', folder.to_dict(files=False))
+
+    def test_record(self):
+        folder = Resource('d', fileType='folder', files=[Resource('f', name='f', linkShare=None)])
+        restored = Resource.from_record(folder.to_record())
+        self.assertEqual(restored.to_dict(), folder.to_dict())
+        self.assertIs(restored.files[0].inviteDate, MISSING)
+
+
+class thumbnailCacheTest(tempDirTest):
+
+    def test_lru(self):
+        a = Resource('a', resourceNo=1, name='a', updateDate=1)
+        b = Resource('b', resourceNo=2, name='b', updateDate=1)
+        c = Resource('c', resourceNo=3, name='c', updateDate=1)
+
+        cache = ThumbnailCache(self._dir, max_bytes=20)
+        cache.add(a, self.write('a.jpg', b'a' * 10), 10)
+        time.sleep(0.01)
+        cache.add(b, self.write('b.jpg', b'b' * 10), 10)
+        time.sleep(0.01)
+        # a is used after b, so b is evicted
+        self.assertTrue(cache.lookup(a, self.path('a.jpg')))
+        cache.add(c, self.write('c.jpg', b'c' * 10), 10)
+
+        self.assertFalse(os.path.exists(self.path('b.jpg')))
+        self.assertTrue(cache.lookup(a, self.path('a.jpg')))
+        self.assertFalse(cache.lookup(b, self.path('b.jpg')))
+        self.assertEqual(cache.stats()['evicted'], 1)
+
+        # changed file misses, and cache is kept between runs
+        cache.save()
+        cache = ThumbnailCache(self._dir, max_bytes=20)
+        self.assertTrue(cache.lookup(c, self.path('c.jpg')))
+        self.assertFalse(cache.lookup(Resource('c', resourceNo=3, name='c', updateDate=2), self.path('c.jpg')))
+
+
+class thumbnailHintsTest(tempDirTest):
+
+    def test_ttl(self):
+        video = Resource('v', resourceNo=1, name='v.MP4', updateDate=1)
+        hints = ThumbnailHints(self.path('hints.json'), ttl=60)
+        hints.set_endpoint(video, 'get_thumb')
+        hints.set_missing(video)
+        hints.save()
+
+        hints = ThumbnailHints(self.path('hints.json'), ttl=60)
+        # endpoint is kept for the extension, not for the file
+        self.assertEqual(hints.endpoint(Resource('w', name='w.mp4')), 'get_thumb')
+        self.assertIsNone(hints.endpoint(Resource('w', name='w.avi')))
+        self.assertTrue(hints.is_missing(video))
+        self.assertFalse(hints.is_missing(Resource('v', resourceNo=1, name='v.MP4', updateDate=2)))
+
+        # expired records are ignored
+        self.assertIsNone(ThumbnailHints(self.path('hints.json'), ttl=0).endpoint(video))
+        self.assertFalse(ThumbnailHints(self.path('hints.json'), ttl=0).is_missing(video))
+
+
+class partFileTest(tempDirTest):
+
+    def test_missing(self):
+        part = PartFile(self.path('f'), 'key')
+        part.set_size(100)
+        part.add(0, 9)
+        part.add(30, 49)
+        # adjacent range is merged
+        part.add(10, 19)
+        self.assertEqual(part.ranges, [(0, 19), (30, 49)])
+        self.assertEqual(part.offset(), 20)
+        self.assertEqual(part.missing(15), [(20, 29), (50, 64), (65, 79), (80, 94), (95, 99)])
+        self.assertTrue(part.has(35, 40))
+        self.assertFalse(part.has(15, 35))
+
+        part.add(20, 29)
+        part.add(50, 99)
+        self.assertEqual(part.missing(15), [])
+        self.assertTrue(part.complete())
+
+    def test_sidecar_version(self):
+        part = PartFile(self.path('f'), 'key', version=1)
+        part.allocate()
+        part.reset(100, '"etag"')
+        part.add(0, 9)
+        part.save()
+
+        resumed = PartFile(self.path('f'), 'key', version=1)
+        self.assertEqual((resumed.size, resumed.validator, resumed.ranges), (100, '"etag"', [(0, 9)]))
+        # bytes of the other version or file are not resumed
+        self.assertEqual(PartFile(self.path('f'), 'key', version=2).ranges, [])
+        self.assertEqual(PartFile(self.path('f'), 'other', version=1).ranges, [])
+
+
+class multipartFileTest(tempDirTest):
+
+    def _read(self, body, size: int) -> bytes:
+        ret = b''
+        while True:
+            data = body.read(size)
+            if not data:
+                return ret
+            ret += data
+
+    def test_body(self):
+        filePath = self.write('f', bytes(range(256)) * 10)
+        digest = hashlib.sha256()
+        body = MultipartFile({'filesize': 1000}, 'Filedata', filePath, chunk_size=64, offset=100, length=1000, digest=digest)
+        boundary = body.content_type.split('boundary=')[1]
+
+        ret = self._read(body, 100)
+        self.assertEqual(ret, ('--{0}\r\nContent-Disposition: form-data; name="filesize"\r\n\r\n1000\r\n'
+                               '--{0}\r\nContent-Disposition: form-data; name="Filedata"; filename="Filedata"\r\n\r\n').format(boundary).encode()
+                              + (bytes(range(256)) * 10)[100:1100]
+                              + '\r\n--{}--\r\n'.format(boundary).encode())
+        self.assertEqual(len(body), len(ret))
+        self.assertEqual(digest.hexdigest(), hashlib.sha256((bytes(range(256)) * 10)[100:1100]).hexdigest())
+
+
+class manifestSkipTest(tempDirTest):
+
+    def setUp(self):
+        super().setUp()
+        self.mb = mybox.mybox(save_path=self._dir)
+        self.mb.set_manifest(TransferManifest(self.path('manifest.json')))
+        self.filePath = self.write('f', b'data')
+
+    def tearDown(self):
+        self.mb.close()
+        super().tearDown()
+
+    def test_unchanged(self):
+        self.assertFalse(self.mb._upload_unchanged(self.filePath, 'parent'))
+        self.mb._manifest.record(self.filePath, 'upload', 'key', 4, 'sha256', hashlib.sha256(b'data').hexdigest(), parentKey='parent')
+
+        self.assertTrue(self.mb._upload_unchanged(self.filePath, 'parent'))
+        # uploaded to the other folder
+        self.assertFalse(self.mb._upload_unchanged(self.filePath, 'other'))
+
+        # same content with new mtime is found by hash
+        st = os.stat(self.filePath)
+        os.utime(self.filePath, (st.st_atime, st.st_mtime + 10))
+        self.assertFalse(self.mb._upload_unchanged(self.filePath, 'parent'))
+        self.assertTrue(self.mb._upload_unchanged(self.filePath, 'parent', 'sha256'))
+
+        self.write('f', b'atad')
+        self.assertFalse(self.mb._upload_unchanged(self.filePath, 'parent', 'sha256'))
+
+    def test_download_is_not_upload(self):
+        self.mb._manifest.record(self.filePath, 'download', 'key', 4, None, None)
+        self.assertFalse(self.mb._upload_unchanged(self.filePath, None))
+
+
+class checkUploadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mb = mybox.mybox()
+        self.status = 200
+        self.calls = 0
+
+        def post(url, **kargs):
+            self.calls += 1
+            return _FakeResponse(self.status)
+        self.mb.post = post
+
+    def tearDown(self):
+        self.mb.close()
+
+    def test_ttl(self):
+        self.assertEqual(self.mb._check_upload(), (200, False))
+        self.assertEqual(self.mb._check_upload(), (200, True))
+        self.assertEqual(self.calls, 1)
+
+        self.assertEqual(self.mb._check_upload(refresh=True), (200, False))
+        self.assertEqual(self.calls, 2)
+
+        # expired
+        self.mb._checked -= mybox.mybox.CHECK_UPLOAD_TTL
+        self.assertEqual(self.mb._check_upload(), (200, False))
+        self.assertEqual(self.calls, 3)
+
+    def test_failure_is_not_cached(self):
+        self.status = 500
+        self.assertEqual(self.mb._check_upload(), (500, False))
+        self.status = 200
+        self.assertEqual(self.mb._check_upload(), (200, False))
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,365 @@
+import os
+import time
+import queue
+import threading
+
+from log import set_logger
+from jsonfile import load_json, save_json
+
+
+'''
+Thumbnail download stage of collector.
+
+Crawler puts files with thumbnail(Resource.thumbnail_dir != '') into the queue
+and a pool of worker threads downloads each of them once.
+Crawling doesn't wait for thumbnails, call join() when the result is needed.
+With ThumbnailCache, thumbnail of unchanged file(same resourceNo and updateDate)
+is taken from the last run instead of downloading again.
+With ThumbnailHints, the endpoint which worked for the type of file is tried first
+and files known to have no thumbnail are skipped.
+
+document    -> get_thumb2
+others      -> get_thumb3, get_thumb if get_thumb3 gives empty thumbnail
+
+--- usage ---
+cache = ThumbnailCache('./.thumbnails/', max_bytes=500 * 1024 * 1024)
+hints = ThumbnailHints('./.thumbnails/.hints_<account>.json', ttl=7 * 24 * 3600)
+pipeline = ThumbnailPipeline(mb, workers=4, cache=cache, hints=hints)
+pipeline.put(resource)
+...
+pipeline.join()
+pipeline.stats()
+'''
+
+
+class ThumbnailPipeline:
+
+    def __init__(self, mb, workers: int = 4, cache=None, hints=None):
+        # mb: mybox instance
+        # workers: number of concurrent thumbnail downloads
+        # cache: ThumbnailCache. None if every thumbnail should be downloaded
+        # hints: ThumbnailHints. None if every endpoint should be tried in default order
+        self.mb = mb
+        self._workers = workers
+        self._cache = cache
+        self.hints = hints
+        self._logger = set_logger(None)
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        # file_id of queued files. same file found twice (e.g. recent list) is downloaded once
+        self._seen = set()
+
+        self._queued = 0
+        self._fetched = 0
+        self._empty = 0
+        self._failed = 0
+        self._skipped = 0
+        self._bytes = 0
+        self._started = None
+        self._finished = None
+
+    def _start(self):
+        # workers are started on first put
+        for _ in range(self._workers):
+            t = threading.Thread(target=self._work, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def put(self, resource) -> bool:
+        # returns False if the file has no thumbnail, is already queued or is cached
+        if resource.thumbnail_dir == '':
+            return False
+
+        if self.hints is not None and self.hints.is_missing(resource):
+            with self._lock:
+                self._skipped += 1
+            return False
+
+        with self._lock:
+            if resource.file_id in self._seen:
+                return False
+            self._seen.add(resource.file_id)
+
+        if self._cache is not None and self._cache.lookup(resource, self.mb.thumb_path(resource.name, resource.file_id)):
+            return False
+
+        with self._lock:
+            self._queued += 1
+            if self._started is None:
+                self._started = time.monotonic()
+            if not self._threads:
+                self._start()
+
+        self._queue.put(resource)
+        return True
+
+    def fetch(self, resource) -> int:
+        # download thumbnail of the file. returns size of thumbnail
+        fileName = resource.name
+        file_id = resource.file_id
+        if resource.fileType == 'document':
+            size = self.mb.get_thumb2(fileName, resource.resourceKey, file_id)
+        else:
+            endpoints = ['get_thumb3', 'get_thumb']
+            if self.hints is not None and self.hints.endpoint(resource) == 'get_thumb':
+                endpoints.reverse()
+
+            for endpoint in endpoints:
+                size = getattr(self.mb, endpoint)(fileName, file_id)
+                if size > 0:
+                    if self.hints is not None:
+                        self.hints.set_endpoint(resource, endpoint)
+                    break
+
+        if size == 0 and self.hints is not None:
+            self.hints.set_missing(resource)
+        return size
+
+    def _work(self):
+        while True:
+            resource = self._queue.get()
+            if resource is None:
+                self._queue.task_done()
+                return
+
+            try:
+                size = self.fetch(resource)
+            except Exception as e:
+                # thumbnail is not essential. keep collecting other files
+                self._logger.error("Thumbnail download failed: {} ({})".format(resource.name, e))
+                with self._lock:
+                    self._failed += 1
+            else:
+                with self._lock:
+                    if size == 0:
+                        self._empty += 1
+                    else:
+                        self._fetched += 1
+                        self._bytes += size
+                if size > 0 and self._cache is not None:
+                    self._cache.add(resource, self.mb.thumb_path(resource.name, resource.file_id), size)
+            finally:
+                with self._lock:
+                    self._finished = time.monotonic()
+                self._queue.task_done()
+
+    def join(self) -> dict:
+        # wait until every queued thumbnail is downloaded
+        self._queue.join()
+        if self._cache is not None:
+            self._cache.save()
+        if self.hints is not None:
+            self.hints.save()
+        return self.stats()
+
+    def close(self):
+        self.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+    def stats(self) -> dict:
+        """
+        # you can get
+        # {
+        #   queued: int             -> number of files put into the queue
+        #   fetched: int            -> number of saved thumbnails
+        #   empty: int              -> server gave empty thumbnail
+        #   failed: int             -> request failed
+        #   skipped: int            -> known to have no thumbnail (ThumbnailHints)
+        #   bytes: int              -> total size of saved thumbnails
+        #   seconds: float          -> time from first put to last download
+        #   files_per_sec: float
+        #   bytes_per_sec: float
+        #   cache: dict             -> ThumbnailCache.stats. only with cache
+        # }
+        """
+        with self._lock:
+            seconds = 0.0
+            if self._started is not None and self._finished is not None:
+                seconds = self._finished - self._started
+            done = self._fetched + self._empty + self._failed
+            ret = {'queued': self._queued,
+                   'fetched': self._fetched,
+                   'empty': self._empty,
+                   'failed': self._failed,
+                   'skipped': self._skipped,
+                   'bytes': self._bytes,
+                   'seconds': round(seconds, 3),
+                   'files_per_sec': round(done / seconds, 2) if seconds > 0 else 0.0,
+                   'bytes_per_sec': round(self._bytes / seconds, 2) if seconds > 0 else 0.0}
+        if self._cache is not None:
+            ret['cache'] = self._cache.stats()
+        return ret
+
+
+class ThumbnailCache:
+    """
+    Disk cache of thumbnails shared between runs.
+
+    Saved thumbnail is recorded in manifest with resourceNo and updateDate of the file.
+    If the file is not changed since then, thumbnail is not downloaded again.
+    When total size of cached thumbnails is over max_bytes,
+    least recently used thumbnails are removed.
+    manifest (.manifest.json in the thumbnail directory)
+    {
+        resourceNo: {
+            updateDate: int     -> updateDate of the file when thumbnail is saved
+            path: str           -> local thumbnail path
+            size: int
+            used: float         -> last time the thumbnail is saved or hit
+        }
+    ...
+    }
+    """
+
+    MANIFEST = '.manifest.json'
+
+    def __init__(self, directory: str, max_bytes: int = None):
+        # directory: thumbnail directory. e.g) <save_path>/.thumbnails/
+        # max_bytes: size limit of cache. None means no limit
+        self._logger = set_logger(None)
+        self._path = os.path.join(directory, ThumbnailCache.MANIFEST)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = load_json(self._path, self._logger, 'thumbnail manifest') or {}
+        self._bytes = sum(i['size'] for i in self._entries.values())
+
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        # size limit may be smaller than the last run
+        self._evict()
+
+    def lookup(self, resource, path: str) -> bool:
+        # True if thumbnail of the file is cached at the path
+        with self._lock:
+            entry = self._entries.get(resource.file_id)
+            if entry is not None and entry['updateDate'] == resource.updateDate and entry['path'] == path and os.path.exists(path):
+                entry['used'] = time.time()
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, resource, path: str, size: int):
+        with self._lock:
+            old = self._entries.get(resource.file_id)
+            if old is not None:
+                self._bytes -= old['size']
+                # thumbnail of renamed file is saved at the other path
+                if old['path'] != path:
+                    try:
+                        os.remove(old['path'])
+                    except FileNotFoundError:
+                        pass
+            self._entries[resource.file_id] = {'updateDate': resource.updateDate,
+                                               'path': path,
+                                               'size': size,
+                                               'used': time.time()}
+            self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        if self._max_bytes is None or self._bytes <= self._max_bytes:
+            return
+        for file_id, entry in sorted(self._entries.items(), key=lambda i: i[1]['used']):
+            if self._bytes <= self._max_bytes:
+                break
+            try:
+                os.remove(entry['path'])
+            except FileNotFoundError:
+                pass
+            del self._entries[file_id]
+            self._bytes -= entry['size']
+            self.evicted += 1
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            save_json(self._path, self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'hit_rate': round(self.hits / lookups, 3) if lookups > 0 else 0.0,
+                    'evicted': self.evicted,
+                    'files': len(self._entries),
+                    'bytes': self._bytes}
+
+
+class ThumbnailHints:
+    """
+    Negative cache of thumbnail endpoints for an account.
+
+    Remembers which endpoint(get_thumb3 or get_thumb) gave the thumbnail
+    for each type and extension of file, and files which have no thumbnail at all.
+    Records older than ttl seconds are ignored, so the server side change is found again.
+    {
+        endpoints: {
+            'picture:jpg': {endpoint: str, at: float}
+        ...
+        },
+        missing: {
+            resourceNo: {updateDate: int, at: float}   -> changed file is tried again
+        ...
+        }
+    }
+    """
+
+    def __init__(self, path: str, ttl: int = 7 * 24 * 3600):
+        # path: hints file. one file per account
+        # ttl: seconds to keep records
+        self._logger = set_logger(None)
+        self._path = path
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._missing = {}
+        self._load()
+
+    def _load(self):
+        data = load_json(self._path, self._logger, 'thumbnail hints')
+        if data is None:
+            return
+        # expired records are dropped when loaded
+        self._endpoints = {k: v for k, v in data.get('endpoints', {}).items() if self._fresh(v)}
+        self._missing = {k: v for k, v in data.get('missing', {}).items() if self._fresh(v)}
+
+    def _fresh(self, record: dict) -> bool:
+        return time.time() - record['at'] < self._ttl
+
+    def _kind(self, resource) -> str:
+        # ext and fileType of Resource are empty for video, audio and others. extension is taken from the name
+        return resource.fileType + ':' + os.path.splitext(resource.name)[1][1:].lower()
+
+    def endpoint(self, resource):
+        # name of mybox method which worked for this kind of file. None if unknown
+        with self._lock:
+            record = self._endpoints.get(self._kind(resource))
+            if record is None or not self._fresh(record):
+                return None
+            return record['endpoint']
+
+    def set_endpoint(self, resource, endpoint: str):
+        with self._lock:
+            self._endpoints[self._kind(resource)] = {'endpoint': endpoint, 'at': time.time()}
+
+    def is_missing(self, resource) -> bool:
+        with self._lock:
+            record = self._missing.get(resource.file_id)
+            return record is not None and record['updateDate'] == resource.updateDate and self._fresh(record)
+
+    def set_missing(self, resource):
+        with self._lock:
+            self._missing[resource.file_id] = {'updateDate': resource.updateDate, 'at': time.time()}
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            save_json(self._path, {'endpoints': self._endpoints, 'missing': self._missing})
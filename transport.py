@@ -0,0 +1,137 @@
+import threading
+from urllib import parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from log import set_logger
+
+
+'''
+HTTP transport for mybox module.
+
+MYBOX spreads its API over several hosts (api, files, zip, photo, thumb...)
+so the transport keeps one pooled requests.Session per host.
+Connections are kept alive and reused between calls instead of doing
+a new TCP+TLS handshake on every request.
+
+--- usage ---
+transport = Transport(pool_size=10, timeout=(5, 60))
+r = transport.request('GET', 'https://api.mybox.naver.com/service/user/get', cookies=..., headers=...)
+transport.stats()
+'''
+
+
+class Transport:
+
+    def __init__(self, pool_size: int = 10, keep_alive: bool = True, timeout=5000, max_retries: int = 0):
+        # pool_size: max number of kept connections per host
+        # keep_alive: if False every request asks the server to close the connection
+        # timeout: default timeout of requests. (connect, read) tuple is also possible
+        self._logger = set_logger(None)
+        self._pool_size = pool_size
+        self._keep_alive = keep_alive
+        self._timeout = timeout
+        self._max_retries = max_retries
+
+        self._sessions = {}
+        self._requests = {}
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def session(self, host: str) -> requests.Session:
+        # return pooled session of the host. session is created on first use
+        with self._lock:
+            if host not in self._sessions:
+                self._logger.debug("New session for host: {}".format(host))
+                adapter = HTTPAdapter(pool_connections=1,
+                                      pool_maxsize=self._pool_size,
+                                      max_retries=self._max_retries)
+                s = requests.Session()
+                s.mount('https://', adapter)
+                s.mount('http://', adapter)
+                self._sessions[host] = s
+                self._requests[host] = 0
+            return self._sessions[host]
+
+    def set_host_limit(self, host: str, limit: int):
+        # max number of concurrent requests to the host
+        # e.g) set_host_limit('api.mybox.naver.com', 8)
+        with self._lock:
+            self._limits[host] = threading.BoundedSemaphore(limit)
+
+    def request(self, method: str, url: str, **kargs) -> requests.Response:
+        host = parse.urlsplit(url).netloc
+        s = self.session(host)
+
+        kargs.setdefault('timeout', self._timeout)
+        if self._keep_alive is False:
+            kargs['headers'] = dict(kargs.get('headers') or {}, connection='close')
+
+        with self._lock:
+            self._requests[host] += 1
+            limit = self._limits.get(host)
+
+        if limit is None:
+            return s.request(method, url, **kargs)
+
+        limit.acquire()
+        try:
+            r = s.request(method, url, **kargs)
+        except BaseException:
+            limit.release()
+            raise
+
+        if kargs.get('stream', False) is False:
+            limit.release()
+            return r
+
+        # streamed body is still being transferred, so keep the slot until the connection is given back.
+        # urllib3 calls release_conn when the body is read to the end, and Response.close calls it too
+        release_conn = r.raw.release_conn
+        once = threading.Lock()
+        def release_conn_and_slot():
+            try:
+                release_conn()
+            finally:
+                if once.acquire(blocking=False):
+                    limit.release()
+        r.raw.release_conn = release_conn_and_slot
+        return r
+
+    def stats(self) -> dict:
+        """
+        # connection reuse statistics per host
+        # you can get
+        # {
+        #   'api.mybox.naver.com': {
+        #       requests: int       -> number of requests sent to the host
+        #       connections: int    -> number of connections opened to the host
+        #       reused: int         -> requests served on already opened connection
+        #   }
+        # ...
+        """
+        ret = {}
+        with self._lock:
+            sessions = list(self._sessions.items())
+            requests_count = dict(self._requests)
+
+        for host, s in sessions:
+            connections = 0
+            for adapter in set(s.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+            ret[host] = {'requests': requests_count[host],
+                         'connections': connections,
+                         'reused': max(requests_count[host] - connections, 0)}
+        return ret
+
+    def close(self):
+        with self._lock:
+            for s in self._sessions.values():
+                s.close()
+            self._sessions.clear()
+            self._requests.clear()
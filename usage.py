@@ -6,10 +6,15 @@ import json
 import argparse
 import urllib.parse
 import time
+import threading
 from urllib import parse
 from logging import DEBUG
 
 from mybox import mybox
+from crawler import FolderCrawler, IncrementalLister, CrawlCheckpoint
+from drive_index import DriveIndex
+from mybox_resource import Resource, MISSING
+from thumbnail import ThumbnailPipeline, ThumbnailCache, ThumbnailHints
 from credential import Credential
 from login import NaverLogin
 from log import *
@@ -33,9 +38,36 @@ def print_progress(status: str, **kwargs) -> None:
     log_params = ['{0}={1}'.format(k, encode_message(str(v))) for k, v in log_params.items()]
     log = '&'.join(log_params)
 
-    print(log, file=sys.stdout)
+    print(log, file=PROGRESS_OUT)
 
 
+# progress messages go to stderr when file records are streamed to stdout
+PROGRESS_OUT = sys.stdout
+
+
+class NDJSONWriter:
+    # write one json record per file as soon as it is collected
+    # record is same with the item of file list without 'files' field and has 'source' field
+    # e.g) {"common": {...}, "resourceKey": ..., "source": "drive_files"}
+
+    def __init__(self, fp):
+        self._fp = fp
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def write(self, source: str, resource: Resource):
+        record = resource.to_dict(files=False)
+        record['source'] = source
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._fp.write(line)
+            self._fp.flush()
+            self.count += 1
+
+    def close(self):
+        if self._fp is not sys.stdout:
+            self._fp.close()
+
 
 class CloudCollectMybox:
 
@@ -44,14 +76,50 @@ class CloudCollectMybox:
     MOVIE_FORMAT = ['3GP','ASF','AVI','F4V','FLV','HEVC','M2TS','M2V','M4V','MJPEG','MKV','MOV','MP4','MPEG','MPG','MTS','MXF','OGV','RM','TS','VOB','WEBM','WMV','WTV']
     AUDIO_FORMAT = ['8SVX','AAC','AC3','AIFF','AMB','AU','AVR','CAF','CDDA','CVS','CVSD','CVU','DTS','DVMS','FAP','FLAC','FSSD','GSRT','HCOM','HTK','IMA','IRCAM','M4A','M4R','MAUD','MP2','MP3','NIST','OGA','OGG','OPUS','PAF','PRC','PVF','RA','SD2','SLN','SMP','SND','SNDR','SNDT','SOU','SPH','SPX','TTA','TXW','VMS','VOC','VOX','W64','WAV','WMA','WV','WVE']
     DOCUMENT_FORMAT = ['CSV','DJVU','DOC','DOCX','ODP','ODS','ODT','OTT','PDF','PPT','RTF','TXT','XLS','XLSX']
+    # extension -> type of output. document has priority over picture
+    FILE_TYPES = {**{i: 'picture' for i in IMAGE_FORMAT}, **{i: 'document' for i in DOCUMENT_FORMAT}}
 
-    def __init__(self, savepath):
-        self.mb = mybox(save_path=savepath)
+    API_HOST = 'api.mybox.naver.com'
+    THUMBNAIL_HOSTS = ['thumb1.photo.mybox.naver.com', 'thumb2.photo.mybox.naver.com', 'files.mybox.naver.com']
+
+    def __init__(self, savepath, workers: int = 8, thumb_workers: int = 4, index_path: str = None, incremental: bool = False, verify_folders: bool = False, checkpoint_interval: int = 60, thumb_cache_size: int = None):
+        self.mb = mybox(save_path=savepath, pool_size=max(workers, thumb_workers))
         self._logger = set_logger(None)
         self._savepath = savepath
+        self._thumbnail_dir = os.path.join(savepath, '.thumbnail/')
         self._cookies = {}
 
+        # listing and thumbnail downloading are throttled separately
+        self._workers = workers
+        self.mb.set_host_limit(CloudCollectMybox.API_HOST, workers)
+        for host in CloudCollectMybox.THUMBNAIL_HOSTS:
+            self.mb.set_host_limit(host, thumb_workers)
+        # thumbnail of unchanged file is not downloaded again. thumb_cache_size: bytes, None means no limit
+        thumb_cache = ThumbnailCache(os.path.join(savepath, '.thumbnails/'), max_bytes=thumb_cache_size)
+        self._thumbnails = ThumbnailPipeline(self.mb, workers=thumb_workers, cache=thumb_cache)
+
+        # local metadata index of drive files. filled by fetch_file_list
+        self._index = DriveIndex(index_path) if index_path is not None else None
+        # re-list only changed folders. needs index of last crawl
+        self._incremental = incremental and self._index is not None
+        self._verify_folders = verify_folders
+
+        # progress of fetch_file_list is saved at intervals. 0 means no checkpoint
+        self._checkpoint_path = os.path.join(savepath, '.checkpoint.json')
+        self._checkpoint_interval = checkpoint_interval
+
+        # NDJSONWriter. if it is set, file lists are streamed instead of returned
+        self._stream = None
+
     
+    def set_stream(self, writer: NDJSONWriter):
+        self._stream = writer
+
+    def set_account(self, user_id: str):
+        # results of thumbnail endpoints are remembered per account. check thumbnail.py
+        path = os.path.join(self._savepath, '.thumbnails/', '.hints_' + parse.quote(user_id, safe='') + '.json')
+        self._thumbnails.hints = ThumbnailHints(path)
+
     def set_credentials(self, **kwargs):
         Credential.set_credentials(NID_JKL=kwargs['NID_JKL'],
                                    NID_AUT=kwargs['NID_AUT'],
@@ -61,6 +129,7 @@ class CloudCollectMybox:
         return Credential.get_credentials()
     
     def login(self, id, pw) -> bool:
+        self.set_account(id)
         if self._logger.level == DEBUG:
             return True
         
@@ -71,15 +140,49 @@ class CloudCollectMybox:
         self.mb.set_cookies(Credential.get_credentials())
         return ret
     
-    def fetch_file_list(self):
-        mb_get_list = self.mb.get_list('root').json()
+    def fetch_file_list(self, resume: bool = False):
+        # resume: continue from the checkpoint of the failed run
+        checkpoint = None
+        if self._checkpoint_interval > 0:
+            checkpoint = CrawlCheckpoint(self._checkpoint_path, self._checkpoint_interval)
+        # without checkpoint(--checkpoint_interval 0) there is nothing to resume from
+        resume = resume and checkpoint is not None and os.path.exists(self._checkpoint_path)
+
+        mb_get_list = [] if resume else list(self.mb.iter_list(resourceKey='root'))
 
-        root = [self._generate_common_data(self.mb.get_root_info().json()['result'])]
+        root_info = self.mb.get_root_info().json()['result']
+        root = [self._generate_resource(root_info)]
 
         # Set root directory name to ROOT
-        root[0]['common']['name'] = '[ROOT]'
-        root[0]['files'] = []
-        self._visit_recursively(mb_get_list['result']['list'], root[0]['files'], root[0]['common']['shared'])
+        root[0].name = '[ROOT]'
+        root[0].files = []
+
+        on_checkpoint = None
+        lister = None
+        if self._index is not None:
+            # resumed crawl keeps writing to the crawl of the failed run
+            if not resume:
+                self._index.begin_crawl()
+            if self._incremental:
+                lister = IncrementalLister(self.mb, self._index, verify_folders=self._verify_folders)
+            on_checkpoint = self._index.commit
+
+        on_node = self._node_handler('drive_files', index=True)
+        if on_node is not None and not resume:
+            on_node(root_info, root[0])
+
+        crawler = FolderCrawler(self.mb, self._generate_resources, workers=self._workers, on_file=self._queue_thumbnail,
+                                on_node=on_node, lister=lister, checkpoint=checkpoint, on_checkpoint=on_checkpoint,
+                                collect=self._stream is None)
+        crawler.crawl(mb_get_list, root[0].files, root[0].shared, resume=resume)
+        self._wait_thumbnails()
+
+        if self._index is not None:
+            self._index.end_crawl()
+        if lister is not None:
+            self._logger.info("Incremental crawl. listed folders: {} reused folders: {}".format(lister.listed, lister.reused))
+
+        root = [i.to_dict() for i in root]
 
         if self._logger.level == DEBUG:
             with open('file_list.json', 'w') as f:
@@ -90,18 +193,20 @@ class CloudCollectMybox:
     def fetch_recent_file_list(self):
         root = []
          
-        self._visit_recursively(self.mb.get_recent_list().json()['result']['list'], root, False)
-        self._visit_recursively(self.mb.get_recent_list(sort='create', order='asc', recentType='update').json()['result']['list'], root, False)
+        self._visit_recursively(list(self.mb.iter_recent_list()), root, False, 'recent_files')
+        self._visit_recursively(list(self.mb.iter_recent_list(sort='create', order='asc', recentType='update')), root, False, 'recent_files')
+        self._wait_thumbnails()
 
-        return root
+        return [i.to_dict() for i in root]
     
     def fetch_shared_file_list(self):
         root = []
 
-        self._visit_recursively(self.mb.get_shared_list().json()['result']['list'], root, True)
-        self._visit_recursively(self.mb.get_share_list().json()['result']['list'], root, True)
+        self._visit_recursively(list(self.mb.iter_shared_list()), root, True, 'shared_files')
+        self._visit_recursively(list(self.mb.iter_share_list()), root, True, 'shared_files')
+        self._wait_thumbnails()
 
-        return root
+        return [i.to_dict() for i in root]
 
     
     def fetch_trash_file_list(self):
@@ -109,12 +214,14 @@ class CloudCollectMybox:
 
         # You can't visit folder in trash.
         # Only linear format data will be accepted 
-        for i in self.mb.get_waste_list().json()['result']['list']:
-            common_data = self._generate_common_data(i)
-            ret.append(common_data)
-            if common_data['common']['thumbnail'] != '':
-                self._download_thumbnail(common_data)
-        return ret
+        for resource in self._generate_resources(list(self.mb.iter_waste_list())):
+            if self._stream is not None:
+                self._stream.write('trash_files', resource)
+            else:
+                ret.append(resource)
+            self._queue_thumbnail(resource)
+        self._wait_thumbnails()
+        return [i.to_dict() for i in ret]
     
     def download(self, file):
         resourceKey = file['resourceKey']
@@ -123,145 +230,131 @@ class CloudCollectMybox:
     def search(self, query):
         return self.mb.do_search(keyword=query).json()
     
-    def _generate_common_data(self, data_node):
-
-        # handle ownderId Field
-        ownerId = 0
-        if 'ownderId' in data_node:
-            ownerId = data_node['ownderId']
-        elif 'updateUser' in data_node:
-            ownerId = data_node['updateUser']
-        else:
-            ownerId = 0
+    def _generate_common_data(self, data_node) -> dict:
+        # output format of a file. check mybox_resource.py
+        return self._generate_resource(data_node).to_dict()
+
+    def _generate_resource(self, data_node) -> Resource:
+        return self._generate_resources([data_node])[0]
+
+    def _generate_resources(self, data_nodes: list) -> list:
+        # convert a whole listing page at once
+        # lookups are done in hash tables and attributes are bound once per page.
+        # Dates, download URL and thumbnail path are made later by Resource.to_dict only when needed
+        file_types = CloudCollectMybox.FILE_TYPES
+        thumbnail_dir = self._thumbnail_dir
+
+        ret = []
+        append = ret.append
+        for data_node in data_nodes:
+            get = data_node.get
 
-        # handle name field
-        if 'resourcePath' in data_node:
-            if data_node['resourceType'] == 'folder':
-                name = data_node['resourcePath'].split('/')[-2]
+            # handle ownderId Field
+            if 'ownderId' in data_node:
+                ownerId = data_node['ownderId']
             else:
-                name = data_node['resourcePath'].split('/')[-1]
-        elif 'resourceName' in data_node:
-            name = data_node['resourceName']
-        else:
-            name = ''
-        # handle file extension field
-        ext = ''
-        fileType=''
-        if name.find('.') != -1:
-            tail = name.split('.')[-1]
-            if tail.upper() in CloudCollectMybox.DOCUMENT_FORMAT:
-                ext = tail
-                fileType = 'document'
-            elif tail.upper() in CloudCollectMybox.IMAGE_FORMAT:
-                ext = tail
-                fileType = 'picture'
-        else:
-            ext = ''
-            if data_node['resourceType'] == 'folder':
-                fileType = 'folder'
+                ownerId = get('updateUser', 0)
+
+            # handle name field
+            resourcePath = get('resourcePath', False)
+            if resourcePath is not False:
+                if data_node['resourceType'] == 'folder':
+                    name = resourcePath.split('/')[-2]
+                else:
+                    name = resourcePath.rpartition('/')[2]
+            else:
+                name = get('resourceName', '')
+
+            # handle file extension field
+            # extensions which are not document or picture have no ext and type
+            _, dot, tail = name.rpartition('.')
+            if dot != '':
+                fileType = file_types.get(tail.upper(), '')
+                ext = tail if fileType != '' else ''
             else:
-                fileType = 'file'
+                ext = ''
+                fileType = 'folder' if data_node['resourceType'] == 'folder' else 'file'
 
-        # handle download URL field
-        query = {'NDriveSvcType': 'NHN/ND-WEB Ver',
-                'resourceKey': data_node['resourceKey']}
-    
-        download_url = 'https://files.mybox.naver.com/file/download.api?{}'.format(parse.urlencode(query))
-
-        # handle shared field
-        shared = False
-
-        if 'isSharing' in data_node and data_node['isSharing'] == True:
-            # when called by https://api.mybox.naver.com/service/file/get?resourceKey=, then you can find isSharing field 
-            shared = True 
-        elif 'memberShare' in data_node and data_node['memberShare'] is not None:
-            # when you get shared by friend or someone else
-            shared = True 
-        elif 'linkShare' in data_node and data_node['linkShare'] is not None:
-            # when you share file
-            shared = True 
-        elif 'isUrlLink' in data_node:
-            # if you share file then isUrlLink should be true
-            if data_node['isUrlLink'] == True and 'linkShare' in data_node:
+            # handle shared field
+            if get('isSharing') == True:
+                # when called by https://api.mybox.naver.com/service/file/get?resourceKey=, then you can find isSharing field 
                 shared = True
-
-        # fileid
-        fileId = str(data_node.get('resourceNo', 0))
-
-        # Final format
-        format = {'common':{
-            'file_id': fileId,
-            'download_url': download_url if fileType != 'folder' and 'deleteDate' not in data_node else '',
-            'type': fileType,
-            'name': name, 
-            'size': data_node.get('resourceSize', 0),
-            'ext': ext,
-            'ctime': time.strftime('%Y-%m-%d %X', time.localtime(data_node.get('createDate', 1)/1000)),
-            'mtime': time.strftime('%Y-%m-%d %X', time.localtime(data_node.get('updateDate',1)/1000)),
-            'owner': ownerId,
-            'history_count': 0,
-            'shared': shared,
-            'thumbnail': os.path.join(self._savepath, '.thumbnail/', (name + '_' + fileId + '.jpg'))  if 'isThumbnail' in data_node.keys() and data_node['isThumbnail'] == True else '',
-            },
-            'accessDate': time.strftime('%Y-%m-%d %X', time.localtime(data_node.get('accessDate', 1)/1000)),
-            'isProtected': data_node.get('isProtected', False),
-            'isPasswordLocked': data_node.get('isPasswordLocked', False),
-            'resourcePath': data_node.get('resourcePath', False),
-            'resourceKey': data_node.get('resourceKey', False)
-        }
-
-        # for shared files.
-        # shared files include 'inviteDate', 'membeShare' field
-
-        if 'inviteDate' in data_node:
-            format['inviteDate'] = time.strftime('%Y-%m-%d %X', time.localtime(data_node['inviteDate']/1000))
-        if 'membeShare' in data_node:
-            format['membeShare'] = data_node['membeShare']
-        if 'linkShare' in data_node:
-            format['linkShare'] = data_node['linkShare']
-
-        # for deleted file
-        # deleted files include 'deleteDate', 'originalPath' field
-        if 'deleteDate' in data_node:
-            format['deleteDate'] = time.strftime('%Y-%m-%d %X', time.localtime(data_node['deleteDate']/1000))
-        if 'originalPath' in data_node:
-            format['originalPath'] = data_node['originalPath']
-
-        return format
+            elif get('memberShare') is not None:
+                # when you get shared by friend or someone else
+                shared = True
+            elif get('linkShare') is not None:
+                # when you share file
+                shared = True
+            else:
+                # if you share file then isUrlLink should be true
+                shared = get('isUrlLink') == True and 'linkShare' in data_node
+
+            # shared files include 'inviteDate', 'membeShare' field
+            # deleted files include 'deleteDate', 'originalPath' field
+            append(Resource(data_node['resourceKey'],
+                            resourceNo=get('resourceNo', 0),
+                            fileType=fileType,
+                            name=name,
+                            size=get('resourceSize', 0),
+                            ext=ext,
+                            createDate=get('createDate', 1),
+                            updateDate=get('updateDate', 1),
+                            accessDate=get('accessDate', 1),
+                            owner=ownerId,
+                            shared=shared,
+                            thumbnail_dir=thumbnail_dir if get('isThumbnail') == True else '',
+                            isProtected=get('isProtected', False),
+                            isPasswordLocked=get('isPasswordLocked', False),
+                            resourcePath=resourcePath,
+                            inviteDate=get('inviteDate', MISSING),
+                            membeShare=get('membeShare', MISSING),
+                            linkShare=get('linkShare', MISSING),
+                            deleteDate=get('deleteDate', MISSING),
+                            originalPath=get('originalPath', MISSING)))
+        return ret
     
     def _check_file_type(self, file):
         return file['resourceType']
     
-    def _download_thumbnail(self, file: dict):
+    def _queue_thumbnail(self, file: Resource):
+        # thumbnails are downloaded by separate stage while crawling. check thumbnail.py
         if self._logger.level == DEBUG:
             return
-    
-        fileName = file['common']['name']
-        file_id = str(file['common']['file_id'])
-        if file['common']['type'] == 'document':
-            self.mb.get_thumb2(fileName, file['resourceKey'], str(file_id))
-        else:
-            if self.mb.get_thumb3(fileName, file_id) == 0:
-                self.mb.get_thumb(fileName, file_id)
-            
-
-    def _visit_recursively(self, folder_list, parent, parent_dir_is_shared):
-
-        for i in folder_list:
-            common_data = self._generate_common_data(i)
-            if parent_dir_is_shared == True:
-                common_data['common']['shared'] = True
-            if i['resourceType'] == 'folder':
-                common_data['files'] = []
-                
-                self._visit_recursively(self.mb.get_list(resourceKey=i['resourceKey']).json()['result']['list'], common_data['files'], common_data['common']['shared'])
-            else:
-                if common_data['common']['thumbnail'] != '':
-                    self._download_thumbnail(common_data)
-            parent.append(common_data)
-        return parent
-
-def main():
+        self._thumbnails.put(file)
+
+    def _wait_thumbnails(self):
+        stats = self._thumbnails.join()
+        if stats['queued'] > 0:
+            self._logger.info("Thumbnails: {fetched} saved, {empty} empty, {failed} failed, {skipped} skipped, {files_per_sec} files/s, {bytes_per_sec} bytes/s".format(**stats))
+        if stats['cache']['hits'] > 0:
+            self._logger.info("Thumbnail cache: {hits} hits, {misses} misses, {evicted} evicted, {bytes} bytes".format(**stats['cache']))
+
+    def _index_node(self, data_node, resource: Resource):
+        self._index.add(data_node, shared=resource.shared, thumbnail=resource.thumbnail)
+
+    def _node_handler(self, source: str, index: bool = False):
+        # callback of FolderCrawler for every file and folder. None if nothing to do
+        handlers = []
+        if index and self._index is not None:
+            handlers.append(self._index_node)
+        if self._stream is not None:
+            handlers.append(lambda data_node, resource: self._stream.write(source, resource))
+
+        if not handlers:
+            return None
+
+        def on_node(data_node, resource):
+            for handler in handlers:
+                handler(data_node, resource)
+        return on_node
+
+    def _visit_recursively(self, folder_list, parent, parent_dir_is_shared, source: str = ''):
+        # folders are listed breadth-first by worker pool. check crawler.py
+        crawler = FolderCrawler(self.mb, self._generate_resources, workers=self._workers, on_file=self._queue_thumbnail,
+                                on_node=self._node_handler(source), collect=self._stream is None)
+        return crawler.crawl(folder_list, parent, parent_dir_is_shared)
+
+def parse_args():
     parser = argparse.ArgumentParser(
         description='네이버 MYBOX 서버로부터 파일 목록을 수집하는 모듈'
     )
@@ -302,20 +395,75 @@ def main():
                         type=str,
                         help="Query to search in Mybox")
 
+    parser.add_argument('--workers',
+                        help='Number of concurrent folder listing requests',
+                        type=int,
+                        default=8)
+    parser.add_argument('--thumb_workers',
+                        help='Number of concurrent thumbnail downloads',
+                        type=int,
+                        default=4)
+    parser.add_argument('--index',
+                        help='SQLite file to store metadata index of drive files',
+                        type=str)
+    parser.add_argument('--incremental',
+                        action='store_true',
+                        help='Re-list only folders changed since the last crawl stored in --index')
+    parser.add_argument('--verify_folders',
+                        action='store_true',
+                        help='With --incremental, check updateDate of every folder instead of trusting parent folder')
+    parser.add_argument('--resume',
+                        action='store_true',
+                        help='Resume drive file listing from the checkpoint of the failed run')
+    parser.add_argument('--stream',
+                        help='Write one JSON record per file to the file as soon as it is collected. - means stdout',
+                        type=str)
+    parser.add_argument('--checkpoint_interval',
+                        help='Seconds between checkpoints of drive file listing. 0 disables checkpoint',
+                        type=int,
+                        default=60)
+    parser.add_argument('--thumb_cache_size',
+                        help='Size limit of thumbnail cache in MB. least recently used thumbnails are removed',
+                        type=int)
+
     args = parser.parse_args()
 
+    if args.incremental and args.index is None:
+        parser.error('--incremental needs --index')
+
+    # chosen before the first progress message, so stdout has only file records
+    if args.stream == '-' and not (args.download or args.query):
+        global PROGRESS_OUT
+        PROGRESS_OUT = sys.stderr
+    return args
+
+
+def main(args=None):
+    if args is None:
+        args = parse_args()
 
     if not os.path.exists(args.savepath):
         os.makedirs(args.savepath)
         
-    m = CloudCollectMybox(args.savepath)
+    m = CloudCollectMybox(args.savepath, workers=args.workers, thumb_workers=args.thumb_workers, index_path=args.index, incremental=args.incremental, verify_folders=args.verify_folders,
+                          checkpoint_interval=args.checkpoint_interval,
+                          thumb_cache_size=args.thumb_cache_size * 1024 * 1024 if args.thumb_cache_size is not None else None)
     if args.use_creds:
         m.set_credentials(NID_JKL=args.nid_jkl, NID_AUT=args.nid_aut, NID_SES=args.nid_ses)
+        m.set_account(args.user_id)
     else:
         if not m.login(args.user_id, args.user_pw):
             raise Exception('Failed to login')
         print_progress('loading', progress=10, message='Success to login')
 
+    stream = None
+    if args.stream is not None and not (args.download or args.query):
+        if args.stream == '-':
+            stream = NDJSONWriter(sys.stdout)
+        else:
+            stream = NDJSONWriter(open(args.stream, 'a' if args.resume and args.checkpoint_interval > 0 else 'w', encoding='utf-8'))
+        m.set_stream(stream)
+
     res = {
         'service': 'mybox',
         'credential': m.get_credentials(),
@@ -333,7 +481,7 @@ def main():
         res['drive_files'] = m.search(args.query)
 
     else:
-        res['drive_files'] = m.fetch_file_list()
+        res['drive_files'] = m.fetch_file_list(resume=args.resume)
         print_progress('loading', progress=30, message='Success to fetch drive files')
 
         res['shared_files'] = m.fetch_shared_file_list()
@@ -347,10 +495,16 @@ def main():
 
         print_progress('loading', progress=100, message='Success to fetch all files')
 
+        if stream is not None:
+            # file lists are already written. return summary only
+            del res['drive_files'], res['shared_files'], res['trash_files'], res['recent_files']
+            res['stream'] = args.stream
+            res['count'] = stream.count
+            stream.close()
+
         if m._logger.level == DEBUG:
             with open('parsing_result.json', 'w') as f:
                 f.write(json.dumps(res))
-        res = json.dumps(res)
     return json.dumps(res) if type(res) in [dict, list] else str(res)
 
 
@@ -358,8 +512,9 @@ def main():
 if __name__ == '__main__':
     data = ''
     try:
+        args = parse_args()
         print_progress('start')
-        data = main()
+        data = main(args)
     except Exception as e:
         import traceback
         print_progress('error', message=str(e)+'\n'+traceback.format_exc())